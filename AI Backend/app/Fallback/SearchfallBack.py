@@ -1,12 +1,28 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from fastapi import HTTPException
 from app.Tools.SearchTool.DuckDuckgoSearch import search_snippet_using_DuckDuckGoSearchRun
 from app.Tools.SearchTool.Tavily import search_snippet_using_tavily
 from app.Tools.SearchTool.Exa import search_snippet_using_exa
 from app.Tools.SearchTool.GoogleSepher import search_snippet_using_serper
-from langchain_groq import ChatGroq
+from app.Utiles.llm_utils import get_llm
+from app.Utiles.metrics import stage, search_engine_results
 
 
-llm = ChatGroq(model="llama-3.1-8b-instant", temperature=0.2)
+# "hedged" queries every engine concurrently, "sequential" keeps the old one-by-one order.
+SEARCH_MODE = os.getenv("SEARCH_MODE", "hedged")
+# Head start (seconds) each engine gets over the next one in `search_engines`.
+SEARCH_HEDGE_DELAY = float(os.getenv("SEARCH_HEDGE_DELAY", "0.3"))
+# Deadline (seconds) for a single engine call, measured from when it is started.
+SEARCH_ENGINE_TIMEOUT = float(os.getenv("SEARCH_ENGINE_TIMEOUT", "6"))
+# Threads for the blocking engine SDK calls. A timed-out or losing call can't be interrupted and
+# keeps its thread until the SDK returns, so engines get their own pool rather than the default
+# executor shared with retrieval and extraction.
+SEARCH_THREADS = int(os.getenv("SEARCH_THREADS", "16"))
+
+_search_pool = ThreadPoolExecutor(max_workers=SEARCH_THREADS, thread_name_prefix="search")
 
 def preprocess_topic_for_search(topic: str) -> str:
     """
@@ -47,48 +63,110 @@ def is_valid_snippet(snippet: str) -> bool:
         return False
     return True
 
-def generate_fallback_article(topic: str) -> str:
-    prompt = f"""
+def _fallback_article_prompt(topic: str) -> str:
+    return f"""
     Write a clear, detailed, and technically accurate article about "{topic}".
     It should be around 250–300 words, well-structured, and useful for creating multiple-choice quiz questions.
     Include definitions, examples, and practical applications.
     Make sure the explanation is original and not repeated from earlier responses.
     """
-    response = llm.invoke(prompt)
+
+
+async def agenerate_fallback_article(topic: str) -> str:
+    with stage("search.fallback_article"):
+        response = await get_llm("llama-3.1-8b-instant", 0.2).ainvoke(_fallback_article_prompt(topic))
     return response.content.strip()
 
 
-def Search_article_by_topic(topic: str, regenerate: bool = False) -> str:
+search_engines = [
+    ("Tavily", search_snippet_using_tavily),
+    ("DuckDuckGo", search_snippet_using_DuckDuckGoSearchRun),
+    ("Exa", search_snippet_using_exa),
+    ("Serper", search_snippet_using_serper),
+]
+
+
+async def _run_engine(name: str, engine, search_topic: str, delay: float, timeout: float) -> str:
+    if delay > 0:
+        await asyncio.sleep(delay)
+    try:
+        with stage(f"search.engine.{name}"):
+            call = asyncio.get_running_loop().run_in_executor(_search_pool, engine, search_topic)
+            raw = await asyncio.wait_for(call, timeout)
+    except asyncio.TimeoutError:
+        search_engine_results.inc(engine=name, outcome="timeout")
+        raise
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        search_engine_results.inc(engine=name, outcome="error")
+        raise
+    cleaned = extract_snippet(raw)
+    search_engine_results.inc(engine=name, outcome="success" if is_valid_snippet(cleaned) else "invalid")
+    return cleaned
+
+
+async def hedged_search(
+    search_topic: str,
+    hedge_delay: float = SEARCH_HEDGE_DELAY,
+    engine_timeout: float = SEARCH_ENGINE_TIMEOUT,
+) -> Optional[str]:
+    """
+    Query all engines concurrently and return the first valid snippet.
+    Engine i starts i * hedge_delay seconds late, so the engines listed first get a head start.
+    Remaining engines are cancelled as soon as one wins; total time is bounded by
+    (len(search_engines) - 1) * hedge_delay + engine_timeout.
+    Cancellation only stops the wait: an engine call already running finishes in the background
+    (on _search_pool), one still queued for a thread is dropped.
+    """
+    tasks = [
+        asyncio.create_task(_run_engine(name, engine, search_topic, i * hedge_delay, engine_timeout))
+        for i, (name, engine) in enumerate(search_engines)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                cleaned = await next_done
+            except Exception:
+                continue
+            if is_valid_snippet(cleaned):
+                return cleaned
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def aSearch_article_by_topic(topic: str, regenerate: bool = False, mode: Optional[str] = None) -> str:
     """
     Search for an article by topic using multiple engines.
     If regenerate=True, skip search and create a new article directly.
+    Search tools are blocking SDK calls, so each one runs on the search thread pool.
+    mode="hedged" (default, see SEARCH_MODE) fans out to all engines at once,
+    mode="sequential" tries them one after another.
     """
 
     if not topic or len(topic.strip().split()) < 1:
         raise HTTPException(status_code=400, detail="Topic too vague or short. Provide a longer topic.")
 
     if regenerate:
-        return generate_fallback_article(topic)
+        return await agenerate_fallback_article(topic)
 
     search_topic = preprocess_topic_for_search(topic)
 
-    search_engines = [
-        ("Tavily", search_snippet_using_tavily),
-        ("DuckDuckGo", search_snippet_using_DuckDuckGoSearchRun),
-        ("Exa", search_snippet_using_exa),
-        ("Serper", search_snippet_using_serper),
-    ]
+    if (mode or SEARCH_MODE) == "hedged":
+        cleaned = await hedged_search(search_topic)
+        if cleaned:
+            return cleaned
+        return await agenerate_fallback_article(topic)
 
     for name, engine in search_engines:
         try:
-            raw = engine(search_topic)
-            cleaned = extract_snippet(raw)
+            cleaned = await _run_engine(name, engine, search_topic, 0, SEARCH_ENGINE_TIMEOUT)
 
             if is_valid_snippet(cleaned):
                 return cleaned
 
-        except Exception as e:
-             continue
-    return generate_fallback_article(topic)
-
-
+        except Exception:
+            continue
+    return await agenerate_fallback_article(topic)
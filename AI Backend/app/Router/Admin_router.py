@@ -0,0 +1,48 @@
+import hmac
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+from app.Utiles.vectorstore_utils import NamespaceBusy, memory_report, unload_namespace, delete_namespace, enforce_memory_budget
+
+# Admin endpoints require a matching X-Admin-Token header; without ADMIN_TOKEN they are disabled.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set).")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/memory", summary="Memory held by each loaded vectorstore namespace, against the global budget")
+async def memory():
+    return {"success": True, "memory": memory_report()}
+
+@router.post("/memory/enforce", summary="Evict least recently used namespaces until under the budget")
+async def enforce_budget():
+    evicted = await run_in_threadpool(enforce_memory_budget)
+    return {"success": True, "evicted": evicted, "memory": memory_report()}
+
+@router.post("/namespaces/{namespace}/unload", summary="Drop a namespace from memory (kept on disk)")
+async def unload(namespace: str):
+    try:
+        unloaded = await run_in_threadpool(unload_namespace, namespace)
+    except NamespaceBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not unloaded:
+        raise HTTPException(status_code=404, detail=f"Namespace '{namespace}' is not loaded.")
+    return {"success": True, "namespace": namespace}
+
+@router.delete("/namespaces/{namespace}", summary="Delete a namespace from memory and disk")
+async def delete(namespace: str):
+    try:
+        deleted = await run_in_threadpool(delete_namespace, namespace)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except NamespaceBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Namespace '{namespace}' not found.")
+    return {"success": True, "namespace": namespace}
@@ -1,6 +1,12 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.Service.ChatWithDocs import handle_file_upload,  chat_with_docs , chat_with_url
+from app.Service.ChatWithDocs import handle_file_upload,  achat_with_docs , achat_with_url
+from app.Service.ChatWithDocs import astream_chat_with_docs, astream_chat_with_url
+from app.Service.Jobs import aqueue_file_job
+from app.Utiles.streaming import stream_events
+from app.Utiles.vectorstore_utils import get_embeddings, list_documents, delete_document
 
 router = APIRouter()
 
@@ -13,10 +19,12 @@ class URLChatRequest(BaseModel):
     url: str
     top_k: int = 4
 
-@router.post("/upload-file", summary="Upload and ingest a file")
-async def upload_file(file: UploadFile = File(...)):
+@router.post("/upload-file", summary="Upload and ingest a file (background=true: queue it and return a job id)")
+async def upload_file(request: Request, file: UploadFile = File(...), background: bool = Form(False)):
+    if background:
+        return await aqueue_file_job("ingest-file", file, request)
     try:
-        result = handle_file_upload(file)
+        result = await run_in_threadpool(handle_file_upload, file)
         return {"success": True, "details": result}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to ingest file: {str(e)}")
@@ -24,15 +32,46 @@ async def upload_file(file: UploadFile = File(...)):
 @router.post("/chat-on-docs", summary="Chat with ingested documents")
 async def chat_docs(request: ChatRequest):
     try:
-        result = chat_with_docs(request.topic, top_k=request.top_k)
+        result = await achat_with_docs(request.topic, top_k=request.top_k)
         return {"success": True, "response": result}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
 @router.post("/chat-url", summary="Chat with content from a URL (no ingestion)")
 async def chat_url(request: URLChatRequest):
     try:
-        result = chat_with_url(request.topic, request.url, top_k=request.top_k)
+        result = await achat_with_url(request.topic, request.url, top_k=request.top_k)
         return {"success": True, "response": result}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to chat on URL: {str(e)}")
+
+@router.post("/chat-on-docs/stream", summary="Chat with ingested documents, streamed as server-sent events")
+async def chat_docs_stream(request: ChatRequest, http_request: Request):
+    events = astream_chat_with_docs(request.topic, top_k=request.top_k)
+    return StreamingResponse(stream_events(http_request, events), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.post("/chat-url/stream", summary="Chat with content from a URL, streamed as server-sent events")
+async def chat_url_stream(request: URLChatRequest, http_request: Request):
+    events = astream_chat_with_url(request.topic, request.url, top_k=request.top_k)
+    return StreamingResponse(stream_events(http_request, events), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/documents", summary="Documents ingested into the chat namespace, with their chunk counts")
+async def documents():
+    return {"success": True, "documents": await run_in_threadpool(list_documents, "default")}
+
+@router.delete("/documents", summary="Remove one ingested document (all of its chunks)")
+async def remove_document(source: str):
+    removed = await run_in_threadpool(delete_document, "default", source)
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"No document with source '{source}'.")
+    return {"success": True, "source": source, "chunks_removed": removed}
+
+@router.get("/embedding-cache", summary="Embedding cache hit/miss counters")
+async def embedding_cache_stats():
+    return {"success": True, "stats": get_embeddings().stats()}
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException , UploadFile, File
+from fastapi import APIRouter, HTTPException , UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from pydantic import BaseModel, ValidationError
 import json
 
-from app.Service.InterviewQGeneration import generate_interview_questions
-from app.Utiles.GetArticle import get_article
+from app.Service.InterviewQGeneration import agenerate_interview_questions, astream_interview_questions
+from app.Service.Jobs import aqueue_file_job
+from app.Utiles.streaming import stream_events, format_ndjson, question_events
+from app.Utiles.GetArticle import aget_article
 
 router = APIRouter()
 
@@ -12,6 +16,7 @@ class InterviewRequest(BaseModel):
     topic: Optional[str] = None
     url: Optional[str] = None
     numberOfQuestions: Optional[int] = 5 
+    regenerate: Optional[bool] = False
 
 class Question(BaseModel):
     question: str
@@ -29,13 +34,14 @@ async def interview_question(req: InterviewRequest):
         )
 
     try:
-        article = get_article(topic=req.topic, url=req.url)
+        article = await aget_article(topic=req.topic, url=req.url)
         if not article or article.strip() == "":
             raise HTTPException(status_code=400, detail="Could not extract article content.")
 
-        result = generate_interview_questions(
+        result = await agenerate_interview_questions(
             article=article,
-            numberOfQuestions=req.numberOfQuestions
+            numberOfQuestions=req.numberOfQuestions,
+            regenerate=bool(req.regenerate)
         )
 
         if isinstance(result, dict):
@@ -63,22 +69,45 @@ async def interview_question(req: InterviewRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/interview-question-file", summary="Generate interview questions from uploaded file")
+@router.post("/interview-question/stream", summary="Stream interview questions as NDJSON, one line per question")
+async def interview_question_stream(req: InterviewRequest, request: Request):
+    if not req.topic and not req.url:
+        raise HTTPException(status_code=422, detail="Please provide either a 'topic' or a 'url'.")
+
+    try:
+        article = await aget_article(topic=req.topic, url=req.url)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not article or article.strip() == "":
+        raise HTTPException(status_code=400, detail="Could not extract article content.")
+
+    questions = astream_interview_questions(article, req.numberOfQuestions, regenerate=bool(req.regenerate))
+    return StreamingResponse(stream_events(request, question_events(questions), format_ndjson),
+                             media_type="application/x-ndjson")
+
+@router.post("/interview-question-file", summary="Generate interview questions from uploaded file (background=true: queue it and return a job id)")
 async def interview_question_file(
+    request: Request,
     file: UploadFile = File(...),
-    numberOfQuestions: int = 5
+    numberOfQuestions: int = Form(5),
+    regenerate: bool = Form(False),
+    background: bool = Form(False)
 ):
+    if background:
+        return await aqueue_file_job("interview-file", file, request, numberOfQuestions=numberOfQuestions, regenerate=regenerate)
     try:
-        from app.Utiles.file_utils import save_uploadfile_temp, load_file_text
-        temp_path = save_uploadfile_temp(file)
-
-        article = load_file_text(temp_path)
+        from app.Utiles.file_utils import read_upload_text
+        article = await run_in_threadpool(read_upload_text, file)
         if not article.strip():
             raise HTTPException(status_code=400, detail="No text extracted from file.")
 
-        result = generate_interview_questions(article=article, numberOfQuestions=numberOfQuestions)
+        result = await agenerate_interview_questions(article=article, numberOfQuestions=numberOfQuestions, regenerate=regenerate)
 
         return {"success": True, "questions": result.questions}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
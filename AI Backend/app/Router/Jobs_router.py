@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException
+from app.Service.Jobs import jobs, job_view
+
+router = APIRouter()
+
+def _get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (unknown id, or its result has expired).")
+    return job
+
+@router.get("/{job_id}", summary="Status and progress of a background job")
+async def job_status(job_id: str):
+    return {"success": True, "job": job_view(_get_job(job_id))}
+
+@router.get("/{job_id}/result", summary="Result of a finished background job")
+async def job_result(job_id: str):
+    job = _get_job(job_id)
+    if job["status"] in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is still {job['status']}.")
+    if job["status"] == "cancelled":
+        raise HTTPException(status_code=410, detail="Job was cancelled.")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    return {"success": True, **job["result"]}
+
+@router.delete("/{job_id}", summary="Cancel a queued or running background job")
+async def cancel_job(job_id: str):
+    job = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (unknown id, or its result has expired).")
+    return {"success": True, "job": job_view(job)}
@@ -1,17 +1,22 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from pydantic import BaseModel, ValidationError
 import json
 
-from app.Service.QuizGeneration import generate_quiz_questions
-from app.Utiles.GetArticle import get_article
-from app.Utiles.file_utils import save_uploadfile_temp, load_file_text
+from app.Service.QuizGeneration import agenerate_quiz_questions, astream_quiz_questions
+from app.Service.Jobs import aqueue_file_job
+from app.Utiles.streaming import stream_events, format_ndjson, question_events
+from app.Utiles.GetArticle import aget_article
+from app.Utiles.file_utils import read_upload_text
 
 router = APIRouter()
 class QuizRequest(BaseModel):
     topic: Optional[str] = None
     url: Optional[str] = None
     numberOfQuestions: Optional[int] = 5
+    regenerate: Optional[bool] = False
 class Question(BaseModel):
     question: str
     options: list[str]
@@ -26,14 +31,15 @@ async def quiz_question(req: QuizRequest):
         raise HTTPException(status_code=422, detail="Please provide either a 'topic' or a 'url'.")
 
     try:
-        article = get_article(topic=req.topic, url=req.url)
+        article = await aget_article(topic=req.topic, url=req.url)
         if not article or article.strip() == "":
             raise HTTPException(status_code=400, detail="Could not extract article content.")
 
-        result = generate_quiz_questions(
+        result = await agenerate_quiz_questions(
             article=article,
             numberOfQuestions=req.numberOfQuestions,
-            topic=req.topic
+            topic=req.topic,
+            regenerate=bool(req.regenerate)
         )
 
         if isinstance(result, dict):
@@ -61,21 +67,43 @@ async def quiz_question(req: QuizRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/quiz-question-file", summary="Generate quiz questions from uploaded file")
+@router.post("/quiz-question/stream", summary="Stream quiz questions as NDJSON, one line per question")
+async def quiz_question_stream(req: QuizRequest, request: Request):
+    if not req.topic and not req.url:
+        raise HTTPException(status_code=422, detail="Please provide either a 'topic' or a 'url'.")
+
+    try:
+        article = await aget_article(topic=req.topic, url=req.url)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not article or article.strip() == "":
+        raise HTTPException(status_code=400, detail="Could not extract article content.")
+
+    questions = astream_quiz_questions(article, req.numberOfQuestions, regenerate=bool(req.regenerate))
+    return StreamingResponse(stream_events(request, question_events(questions), format_ndjson),
+                             media_type="application/x-ndjson")
+
+@router.post("/quiz-question-file", summary="Generate quiz questions from uploaded file (background=true: queue it and return a job id)")
 async def quiz_question_file(
+    request: Request,
     file: UploadFile = File(...),
-    numberOfQuestions: int = Form(5)
+    numberOfQuestions: int = Form(5),
+    regenerate: bool = Form(False),
+    background: bool = Form(False)
 ):
+    if background:
+        return await aqueue_file_job("quiz-file", file, request, numberOfQuestions=numberOfQuestions, regenerate=regenerate)
     try:
-        temp_path = save_uploadfile_temp(file)
-
-        article = load_file_text(temp_path)
+        article = await run_in_threadpool(read_upload_text, file)
         if not article.strip():
             raise HTTPException(status_code=400, detail="No text extracted from file.")
 
-        result = generate_quiz_questions(
+        result = await agenerate_quiz_questions(
             article=article,
-            numberOfQuestions=numberOfQuestions
+            numberOfQuestions=numberOfQuestions,
+            regenerate=regenerate
         )
 
         if isinstance(result, dict):
@@ -98,5 +126,7 @@ async def quiz_question_file(
 
     except ValidationError as e:
         raise HTTPException(status_code=500, detail=f"Response validation error: {e}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
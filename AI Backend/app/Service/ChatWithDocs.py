@@ -1,45 +1,46 @@
 import os
 import uuid
-from typing import Dict
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
+import asyncio
+from typing import AsyncIterator, Dict, List
 from dotenv import load_dotenv
-from app.Utiles.vectorstore_utils import vectorstores, embeddings
 from app.Utiles.text_utils import chunk_text
-from app.Utiles.vectorstore_utils import ingest_file_to_faiss , get_or_create_vectorstore
-from app.Utiles.file_utils import save_uploadfile_temp
-from app.Tools.URLTOOL.ArticleExtractor import extract_article_from_url
+from app.Utiles.vectorstore_utils import ingest_file_to_faiss, get_embeddings, search_by_ids, similarity_search
+from app.Utiles.vectorstore_utils import aadd_texts_to_namespace
+from app.Utiles.file_utils import uploaded_temp_file
+from app.Utiles import url_registry
+from app.Utiles.url_utils import normalize_url
+from app.Tools.URLTOOL.ArticleExtractor import aextract_article_from_url
+from app.Utiles.llm_utils import get_llm
+from app.Utiles.metrics import stage
 
 load_dotenv()
 
-llm = ChatGroq(model=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),
-               temperature=float(os.getenv("GROQ_TEMPERATURE", "0.3")))
+
+def _llm():
+    return get_llm(os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),
+                   float(os.getenv("GROQ_TEMPERATURE", "0.3")), priority="interactive")
 
 def handle_file_upload(upload_file):
-    temp_path = save_uploadfile_temp(upload_file)
-    result = ingest_file_to_faiss(temp_path, source_name=upload_file.filename)
+    with uploaded_temp_file(upload_file) as (temp_path, sha256):
+        return ingest_uploaded_file(temp_path, upload_file.filename, sha256)
+
+def ingest_uploaded_file(path: str, filename: str, sha256: str, on_progress=None) -> Dict:
+    result = ingest_file_to_faiss(path, source_name=filename, on_progress=on_progress)
 
     if not result:
         raise ValueError("Vectorstore ingestion returned no result")
 
     return {
-        "filename": upload_file.filename,
-        "temp_path": temp_path,
+        "filename": filename,
+        "sha256": sha256,
         "namespace": "default",
         "chunks": result.get("chunks") if isinstance(result, dict) else None,
         "text_length": result.get("text_length") if isinstance(result, dict) else None
     }
 
 
-def chat_with_docs(topic: str, namespace: str = "default", top_k: int = 4, include_sources: bool = False) -> Dict:
-    if namespace not in vectorstores:
-        raise ValueError(f"No vectorstore found for '{namespace}'. Ingest docs first.")
-    vectorstore = vectorstores[namespace]
-    results = vectorstore.similarity_search(topic, k=top_k)
-
-    sources = [{"text": doc.page_content,
-                "metadata": getattr(doc, 'metadata', {}),
-                "score": None} for doc in results]
+def _docs_prompt(topic: str, sources: List[Dict]) -> str:
+    from langchain_core.prompts import ChatPromptTemplate
 
     context = "\n\n---\n\n".join(f"Source: {src['metadata'].get('source','unknown')}\n\n{src['text']}" for src in sources)
 
@@ -59,42 +60,10 @@ def chat_with_docs(topic: str, namespace: str = "default", top_k: int = 4, inclu
         """
     )
     formatted_prompt = prompt_template.format_prompt(context=context, input=topic)
-    prompt_str = formatted_prompt.to_string()
-    llm_response = llm.invoke(prompt_str)
-    answer = getattr(llm_response, "content", llm_response)
-    if isinstance(answer, dict):
-        answer = answer.get("text") or str(answer)
-
-    output = {"answer": answer}
-    if include_sources:
-        output["sources"] = sources
-    return output
+    return formatted_prompt.to_string()
 
 
-
-def chat_with_url(topic: str, url: str, namespace: str = "url_namespace", top_k: int = 4, include_sources: bool = False) -> Dict:
-    # ✅ Extract text from URL
-    article_text = extract_article_from_url(url)
-    if not isinstance(article_text, str) or not article_text.strip():
-        raise ValueError("No article text could be extracted from the provided URL.")
-    if article_text.startswith("Error"):
-        raise ValueError(article_text)
-
-    # ✅ Chunk text and push into FAISS (under a namespace)
-    chunks = chunk_text(article_text)
-    ids = [str(uuid.uuid4()) for _ in chunks]
-    metadatas = [{"source": url, "chunk_index": i} for i in range(len(chunks))]
-
-    vectorstore = get_or_create_vectorstore(namespace)
-    vectorstore.add_texts(chunks, metadatas=metadatas, ids=ids)
-
-    # ✅ Retrieve most relevant chunks
-    results = vectorstore.similarity_search(topic, k=top_k)
-    sources = [
-        {"text": doc.page_content, "metadata": getattr(doc, "metadata", {}), "score": None}
-        for doc in results
-    ]
-
+def _url_prompt(topic: str, sources: List[Dict]) -> str:
     # ✅ Build context
     context = "\n\n---\n\n".join(
         f"Source: {src['metadata'].get('source','unknown')}\n\n{src['text']}"
@@ -102,7 +71,7 @@ def chat_with_url(topic: str, url: str, namespace: str = "url_namespace", top_k:
     )
 
     # ✅ LLM prompt
-    prompt = (
+    return (
         f"You are an expert assistant answering questions using the provided context.\n\n"
         f"<context>\n{context}\n</context>\n\n"
         f"User question: {topic}\n\n"
@@ -113,7 +82,15 @@ def chat_with_url(topic: str, url: str, namespace: str = "url_namespace", top_k:
         "Answer:\n"
     )
 
-    llm_response = llm.invoke(prompt)
+
+def _to_sources(results) -> List[Dict]:
+    return [
+        {"text": doc.page_content, "metadata": getattr(doc, "metadata", {}), "score": None}
+        for doc in results
+    ]
+
+
+def _build_output(llm_response, sources: List[Dict], include_sources: bool) -> Dict:
     answer = getattr(llm_response, "content", llm_response)
     if isinstance(answer, dict):
         answer = answer.get("text") or str(answer)
@@ -122,3 +99,92 @@ def chat_with_url(topic: str, url: str, namespace: str = "url_namespace", top_k:
     if include_sources:
         output["sources"] = sources
     return output
+
+
+def _check_article_text(article_text: str) -> None:
+    if not isinstance(article_text, str) or not article_text.strip():
+        raise ValueError("No article text could be extracted from the provided URL.")
+    if article_text.startswith("Error"):
+        raise ValueError(article_text)
+
+
+def _prepare_url_chunks(url: str, url_key: str, article_text: str):
+    chunks = chunk_text(article_text)
+    ids = [str(uuid.uuid4()) for _ in chunks]
+    metadatas = [{"source": url, "url_key": url_key, "chunk_index": i} for i in range(len(chunks))]
+    return chunks, metadatas, ids
+
+
+def _url_chunk_ids(url_key: str) -> List[str]:
+    # Retrieval is restricted to this URL's own chunks, as registered when it was ingested.
+    entry = url_registry.url_registry.get(url_key)
+    return entry["ids"] if entry else []
+
+
+async def _aretrieve_docs(topic: str, namespace: str, top_k: int) -> List[Dict]:
+    with stage("chat.retrieve"):
+        query_vector = await get_embeddings().aembed_query(topic)
+        # Off the event loop: loading the namespace and waiting for its lock can both take a while.
+        results = await asyncio.to_thread(similarity_search, namespace, query_vector, top_k)
+    if results is None:
+        raise ValueError(f"No vectorstore found for '{namespace}'. Ingest docs first.")
+    return _to_sources(results)
+
+
+async def achat_with_docs(topic: str, namespace: str = "default", top_k: int = 4, include_sources: bool = False) -> Dict:
+    sources = await _aretrieve_docs(topic, namespace, top_k)
+    with stage("chat.llm"):
+        llm_response = await _llm().ainvoke(_docs_prompt(topic, sources))
+    return _build_output(llm_response, sources, include_sources)
+
+
+async def _aretrieve_url(topic: str, url: str, namespace: str, top_k: int) -> List[Dict]:
+    url_key = normalize_url(url)
+
+    if not url_registry.get_fresh_entry(url_key, namespace):
+        with stage("article.extract"):
+            article_text = await aextract_article_from_url(url)
+        _check_article_text(article_text)
+
+        text_hash = url_registry.content_hash(article_text)
+        if url_registry.find_by_hash(url_key, namespace, text_hash):
+            await asyncio.to_thread(url_registry.touch, url_key)
+        else:
+            chunks, metadatas, ids = _prepare_url_chunks(url, url_key, article_text)
+            with stage("chat.ingest_url"):
+                await aadd_texts_to_namespace(namespace, chunks, metadatas, ids)
+            await asyncio.to_thread(url_registry.register, url_key, namespace, text_hash, ids)
+    await asyncio.to_thread(url_registry.evict_expired, url_key)
+
+    with stage("chat.retrieve"):
+        query_vector = await get_embeddings().aembed_query(topic)
+        results = await asyncio.to_thread(search_by_ids, namespace, query_vector, _url_chunk_ids(url_key), top_k)
+    return _to_sources(results)
+
+
+async def achat_with_url(topic: str, url: str, namespace: str = "url_namespace", top_k: int = 4, include_sources: bool = False) -> Dict:
+    sources = await _aretrieve_url(topic, url, namespace, top_k)
+    with stage("chat.llm"):
+        llm_response = await _llm().ainvoke(_url_prompt(topic, sources))
+    return _build_output(llm_response, sources, include_sources)
+
+
+async def _astream_answer(prompt: str, sources: List[Dict]) -> AsyncIterator[Dict]:
+    # Sources go out before the first token so the client can render them while the answer streams.
+    yield {"event": "sources", "data": sources}
+    async for chunk in _llm().astream(prompt):
+        if chunk.content:
+            yield {"event": "token", "data": chunk.content}
+    yield {"event": "done", "data": None}
+
+
+async def astream_chat_with_docs(topic: str, namespace: str = "default", top_k: int = 4) -> AsyncIterator[Dict]:
+    sources = await _aretrieve_docs(topic, namespace, top_k)
+    async for event in _astream_answer(_docs_prompt(topic, sources), sources):
+        yield event
+
+
+async def astream_chat_with_url(topic: str, url: str, namespace: str = "url_namespace", top_k: int = 4) -> AsyncIterator[Dict]:
+    sources = await _aretrieve_url(topic, url, namespace, top_k)
+    async for event in _astream_answer(_url_prompt(topic, sources), sources):
+        yield event
@@ -1,18 +1,13 @@
-import re
-from typing import List
-from pydantic import BaseModel
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
-from app.Utiles.jsonExtract import extract_json
+from functools import lru_cache
+from typing import AsyncIterator, List
 from dotenv import load_dotenv
+from pydantic import BaseModel
+from app.Utiles.llm_utils import get_llm
+from app.Utiles.question_generation import QuestionGenerator
 
 load_dotenv()
 
-llm = ChatGroq(model="llama-3.1-8b-instant", temperature=0.6)
-parser = StrOutputParser()
-
-interview_prompt = PromptTemplate.from_template("""
+INTERVIEW_PROMPT = """
 You are an expert technical interviewer.
 
 Generate exactly {numberOfQuestions} **unique technical interview questions** from the given content.
@@ -38,9 +33,17 @@ JSON Format:
     }}
   ]
 }}
-""")
+"""
+
+
+@lru_cache(maxsize=None)
+def get_interview_chain():
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    interview_prompt = PromptTemplate.from_template(INTERVIEW_PROMPT)
+    return interview_prompt | get_llm("llama-3.1-8b-instant", 0.6, priority="batch") | StrOutputParser()
 
-interview_chain = interview_prompt | llm | parser
 
 class InterviewQuestionItem(BaseModel):
     question: str
@@ -49,20 +52,18 @@ class InterviewQuestionItem(BaseModel):
 class InterviewQuestionModel(BaseModel):
     questions: List[InterviewQuestionItem]
 
-def generate_interview_questions(article: str, numberOfQuestions: int) -> InterviewQuestionModel:
-    raw_output = interview_chain.invoke({
-        "article": article,
-        "numberOfQuestions": numberOfQuestions
-    })
-    
-    try:
-        data = extract_json(raw_output)
-    except Exception:
-        match = re.search(r"\{.*\}", raw_output, re.DOTALL)
-        if match:
-            import json
-            data = json.loads(match.group())
-        else:
-            raise ValueError(f"AI output is not valid JSON: {raw_output[:200]}...")
-
-    return InterviewQuestionModel(**data)
+
+_generator = QuestionGenerator("interview", INTERVIEW_PROMPT, get_interview_chain, InterviewQuestionItem, InterviewQuestionModel)
+
+
+def generate_interview_questions(article: str, numberOfQuestions: int, regenerate: bool = False) -> InterviewQuestionModel:
+    return _generator.generate(article, numberOfQuestions, regenerate)
+
+
+async def agenerate_interview_questions(article: str, numberOfQuestions: int, regenerate: bool = False) -> InterviewQuestionModel:
+    return await _generator.agenerate(article, numberOfQuestions, regenerate)
+
+
+def astream_interview_questions(article: str, numberOfQuestions: int, regenerate: bool = False) -> AsyncIterator[InterviewQuestionItem]:
+    """Yield questions one at a time as the model finishes each of them."""
+    return _generator.astream(article, numberOfQuestions, regenerate)
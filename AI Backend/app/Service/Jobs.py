@@ -0,0 +1,93 @@
+import os
+from typing import Dict
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from app.Service.ChatWithDocs import ingest_uploaded_file
+from app.Service.InterviewQGeneration import generate_interview_questions
+from app.Service.QuizGeneration import generate_quiz_questions
+from app.Utiles.file_utils import load_file_text, remove_temp_file, spool_upload
+from app.Utiles.job_queue import JOB_DB_PATH, JobContext, JobLimitExceeded, get_job_queue
+
+load_dotenv()
+
+# Uploads wait here until their job has run. Must outlive the process when jobs are persisted.
+JOB_FILES_DIR = os.getenv("JOB_FILES_DIR") or (
+    os.path.join(os.path.dirname(os.path.abspath(JOB_DB_PATH)), "job_files") if JOB_DB_PATH else None
+)
+
+
+def _read_article(params: Dict, ctx: JobContext) -> str:
+    article = load_file_text(params["path"])
+    if not article.strip():
+        raise ValueError("No text extracted from file.")
+    ctx.progress(0, params["numberOfQuestions"])
+    return article
+
+
+def _ingest_file(params: Dict, ctx: JobContext) -> Dict:
+    ctx.check_cancelled()
+    return {"details": ingest_uploaded_file(params["path"], params["filename"], params["sha256"], on_progress=ctx.progress)}
+
+
+def _quiz_from_file(params: Dict, ctx: JobContext) -> Dict:
+    article = _read_article(params, ctx)
+    result = generate_quiz_questions(article, params["numberOfQuestions"], regenerate=params["regenerate"])
+    # The LLM call can't be interrupted; a job cancelled meanwhile ends here as cancelled, without a result.
+    ctx.progress(len(result.questions), params["numberOfQuestions"])
+    return {"questions": result.model_dump()["questions"]}
+
+
+def _interview_from_file(params: Dict, ctx: JobContext) -> Dict:
+    article = _read_article(params, ctx)
+    result = generate_interview_questions(article, params["numberOfQuestions"], regenerate=params["regenerate"])
+    ctx.progress(len(result.questions), params["numberOfQuestions"])
+    return {"questions": result.model_dump()["questions"]}
+
+
+def _remove_upload(params: Dict) -> None:
+    remove_temp_file(params["path"])
+
+
+jobs = get_job_queue()
+jobs.register("ingest-file", _ingest_file, cleanup=_remove_upload)
+jobs.register("quiz-file", _quiz_from_file, cleanup=_remove_upload)
+jobs.register("interview-file", _interview_from_file, cleanup=_remove_upload)
+
+
+def submit_file_job(kind: str, upload_file, user: str, **params) -> Dict:
+    """Spool the upload to JOB_FILES_DIR and queue a job for it; returns the public job view."""
+    jobs.start()
+    path, sha256 = spool_upload(upload_file, directory=JOB_FILES_DIR)
+    try:
+        job = jobs.submit(kind, {"path": path, "filename": upload_file.filename, "sha256": sha256, **params}, user)
+    except BaseException:
+        remove_temp_file(path)
+        raise
+    return job_view(job)
+
+
+async def aqueue_file_job(kind: str, upload_file, request, **params) -> JSONResponse:
+    """Router helper for ?background=true uploads: 202 with the job and its status URL, 429 over the job limits."""
+    try:
+        job = await run_in_threadpool(submit_file_job, kind, upload_file, job_user(request), **params)
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    status_url = f"/api/jobs/{job['id']}"
+    return JSONResponse(status_code=202, content={"success": True, "job": job, "status_url": status_url},
+                        headers={"Location": status_url})
+
+
+def job_view(job: Dict) -> Dict:
+    """What clients see of a job: no parameters (server paths), owner or result."""
+    return {key: job[key] for key in ("id", "kind", "status", "progress", "error", "created_at", "updated_at")}
+
+
+def job_user(request) -> str:
+    """Jobs are limited per user: the X-User-Id header when the frontend sends one, else the client address."""
+    return request.headers.get("X-User-Id") or (request.client.host if request.client else "anonymous")
@@ -1,23 +1,13 @@
-import os
-import json
-import re
-from typing import List, Dict
+from functools import lru_cache
+from typing import AsyncIterator, List
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
-from app.Utiles.jsonExtract import extract_json
+from app.Utiles.llm_utils import get_llm
+from app.Utiles.question_generation import QuestionGenerator
 
 load_dotenv()
 
-llm = ChatGroq(model="llama-3.1-8b-instant", temperature=0.6)
-parser = StrOutputParser()
-
-
-_article_cache: Dict[str, Dict] = {}
-
-quiz_prompt = PromptTemplate.from_template("""
+QUIZ_PROMPT = """
 You are an expert MCQ generator for Computer Science, AI, and IT.
 Generate exactly {numberOfQuestions} multiple-choice questions from the given content.
 
@@ -47,9 +37,17 @@ JSON Format:
     }}
   ]
 }}
-""")
+"""
+
+
+@lru_cache(maxsize=None)
+def get_quiz_chain():
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    quiz_prompt = PromptTemplate.from_template(QUIZ_PROMPT)
+    return quiz_prompt | get_llm("llama-3.1-8b-instant", 0.6, priority="batch") | StrOutputParser()
 
-quiz_chain = quiz_prompt | llm | parser
 
 class Question(BaseModel):
     question: str
@@ -61,21 +59,17 @@ class QuizResponse(BaseModel):
     questions: List[Question]
 
 
-def generate_quiz_questions(article: str, numberOfQuestions: int, topic: str = None) -> QuizResponse:
-  
-    raw_output = quiz_chain.invoke({
-        "article": article,
-        "numberOfQuestions": numberOfQuestions
-    })
-
-    try:
-        data = extract_json(raw_output)
-    except Exception:
-        match = re.search(r"\{.*\}", raw_output, re.DOTALL)
-        if match:
-            import json
-            data = json.loads(match.group())
-        else:
-            raise ValueError(f"AI output is not valid JSON: {raw_output[:200]}...")
-
-    return QuizResponse(**data)
+_generator = QuestionGenerator("quiz", QUIZ_PROMPT, get_quiz_chain, Question, QuizResponse)
+
+
+def generate_quiz_questions(article: str, numberOfQuestions: int, topic: str = None, regenerate: bool = False) -> QuizResponse:
+    return _generator.generate(article, numberOfQuestions, regenerate)
+
+
+async def agenerate_quiz_questions(article: str, numberOfQuestions: int, topic: str = None, regenerate: bool = False) -> QuizResponse:
+    return await _generator.agenerate(article, numberOfQuestions, regenerate)
+
+
+def astream_quiz_questions(article: str, numberOfQuestions: int, regenerate: bool = False) -> AsyncIterator[Question]:
+    """Yield questions one at a time as the model finishes each of them."""
+    return _generator.astream(article, numberOfQuestions, regenerate)
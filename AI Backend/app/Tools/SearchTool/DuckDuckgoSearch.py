@@ -1,5 +1,3 @@
-from langchain_community.tools import DuckDuckGoSearchRun
-
 def search_snippet_using_DuckDuckGoSearchRun(topic: str) -> str:
     """
     Uses DuckDuckGoSearchRun to fetch a short news snippet related to a topic.
@@ -11,6 +9,8 @@ def search_snippet_using_DuckDuckGoSearchRun(topic: str) -> str:
         str: A snippet of relevant news or an error message.
     """
     try:
+        from langchain_community.tools import DuckDuckGoSearchRun
+
         tool = DuckDuckGoSearchRun()
         query = f"{topic} news"
         result = tool.invoke({"query": query})
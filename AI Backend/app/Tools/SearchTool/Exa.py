@@ -1,11 +1,12 @@
 import os
 from dotenv import load_dotenv
-from langchain_exa import ExaSearchResults
 
 load_dotenv()
 
 def search_snippet_using_exa(topic: str) -> str:
     try:
+        from langchain_exa import ExaSearchResults
+
         search_tool = ExaSearchResults(api_key=os.getenv("EXA_API_KEY"))
 
         # Perform a search query
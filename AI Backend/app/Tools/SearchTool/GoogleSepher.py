@@ -1,11 +1,12 @@
 import os
 from dotenv import load_dotenv
-from langchain_community.utilities import GoogleSerperAPIWrapper
 
 load_dotenv()
 
 def search_snippet_using_serper(topic: str) -> str:
     try:
+        from langchain_community.utilities import GoogleSerperAPIWrapper
+
         tool = GoogleSerperAPIWrapper()
         result = tool.run(topic + " news")  # ✅ Correct method
 
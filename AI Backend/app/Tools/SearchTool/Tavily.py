@@ -1,4 +1,3 @@
-from langchain_tavily import TavilySearch
 import os
 from dotenv import load_dotenv
 
@@ -6,6 +5,8 @@ load_dotenv()
 
 def search_snippet_using_tavily(topic: str) -> str:
     try:
+        from langchain_tavily import TavilySearch
+
         search_tool = TavilySearch(api_key=os.getenv("TAVILY_API_KEY"))
         
         # Perform the search
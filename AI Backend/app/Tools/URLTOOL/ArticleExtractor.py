@@ -1,9 +1,46 @@
 # app/Tools/ArticleExtractor.py
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_community.document_loaders.firecrawl import FireCrawlLoader
-from newspaper import Article
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Dict, Optional
 from urllib.parse import urlparse
-from langchain_core.documents import Document
+
+from app.Utiles.metrics import extractor_results, stage
+from app.Utiles.url_utils import normalize_url
+
+# Extracted articles are reused for ARTICLE_CACHE_TTL seconds, then revalidated with a conditional GET.
+ARTICLE_CACHE_TTL = float(os.getenv("ARTICLE_CACHE_TTL", "900"))
+ARTICLE_CACHE_MAX_ENTRIES = int(os.getenv("ARTICLE_CACHE_MAX_ENTRIES", "256"))
+ARTICLE_HTTP_TIMEOUT = float(os.getenv("ARTICLE_HTTP_TIMEOUT", "15"))
+# "race" runs the HTML parsers concurrently on one download, "sequential" tries them in order.
+ARTICLE_EXTRACTION_MODE = os.getenv("ARTICLE_EXTRACTION_MODE", "race")
+ARTICLE_PARSER_WORKERS = int(os.getenv("ARTICLE_PARSER_WORKERS", "8"))
+ARTICLE_PARSE_TIMEOUT = float(os.getenv("ARTICLE_PARSE_TIMEOUT", "10"))
+# How much longer a preferred parser is waited for once a less preferred one already has a usable result.
+ARTICLE_PARSE_GRACE = float(os.getenv("ARTICLE_PARSE_GRACE", "2"))
+
+# normalized url -> {"text", "etag", "last_modified", "fetched_at"}
+_article_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_http_session():
+    """One pooled keep-alive session shared by every article fetch."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = os.getenv("USER_AGENT", "Mozilla/5.0 (compatible; AI-All-Docs/1.0)")
+    return session
+
 
 def is_valid_url(url: str) -> bool:
     try:
@@ -12,38 +49,199 @@ def is_valid_url(url: str) -> bool:
     except:
         return False
 
-def extract_article_from_url(url: str) -> str:
-    if not is_valid_url(url):
-        return "Error: Invalid URL format"
 
+def _cache_get(key: str) -> Optional[Dict]:
+    with _cache_lock:
+        entry = _article_cache.get(key)
+        if entry:
+            _article_cache.move_to_end(key)
+        return entry
+
+
+def _cache_put(key: str, entry: Dict) -> None:
+    with _cache_lock:
+        _article_cache[key] = entry
+        _article_cache.move_to_end(key)
+        while len(_article_cache) > ARTICLE_CACHE_MAX_ENTRIES:
+            _article_cache.popitem(last=False)
+
+
+def _newspaper_parser(url: str, html: str) -> str:
+    from newspaper import Article
+
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article.text.strip()
 
+
+def _soup_parser(url: str, html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    # Whole-page text: at least drop the page chrome, and keep block boundaries between words.
+    for tag in soup(["script", "style", "noscript", "nav", "header", "footer", "aside", "form"]):
+        tag.decompose()
+    return soup.get_text(separator="\n", strip=True)
+
+
+def _webbase_loader(url: str) -> str:
+    from langchain_community.document_loaders import WebBaseLoader
+
+    docs = WebBaseLoader(url, session=get_http_session()).load()
+    return docs[0].page_content.strip()
+
+
+def _firecrawl_loader(url: str) -> str:
+    from langchain_community.document_loaders.firecrawl import FireCrawlLoader
+
+    docs = FireCrawlLoader(url).load()
+    return docs[0].page_content.strip()
+
+
+# Parsers that work on already-downloaded HTML, in preference order (also when raced).
+html_parsers = [
+    ("newspaper", _newspaper_parser),
+    ("beautifulsoup", _soup_parser),
+]
+
+
+def _timed(name: str, fn, *args) -> str:
+    # Per-extractor latency and outcome, exported on /metrics.
+    outcome = "error"
     try:
-        # 1. Fallback: Newspaper3k
-        article = Article(url)
-        article.download()
-        article.parse()
-        text = article.text.strip()
-        if len(text) > 100:
-            return text
-    except:
-        pass
+        with stage(f"article.extractor.{name}"):
+            text = fn(*args)
+        outcome = "success" if len(text) > 100 else "empty"
+        return text
+    finally:
+        extractor_results.inc(extractor=name, outcome=outcome)
 
+
+@lru_cache(maxsize=None)
+def _get_parser_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=ARTICLE_PARSER_WORKERS, thread_name_prefix="article-parser")
+
+
+def _usable_text(future: Future) -> Optional[str]:
     try:
-        # 2. Final fallback: WebBaseLoader
-        docs = WebBaseLoader(url).load()
-        text = docs[0].page_content.strip()
-        if len(text) > 100:
-            return text
-    except:
-        pass
+        text = future.result()
+    except Exception:
+        return None
+    return text if len(text) > 100 else None
+
 
+def _race_html_parsers(url: str, html: str) -> Optional[str]:
+    """
+    Run every HTML parser on the same page at once and keep the most preferred usable result.
+    A less preferred parser finishing first (soup is much faster than newspaper) only wins once
+    every parser ahead of it has failed, or has run ARTICLE_PARSE_GRACE seconds past that point.
+    """
+    futures = [_get_parser_pool().submit(_timed, name, fn, url, html) for name, fn in html_parsers]
+    deadline = time.monotonic() + ARTICLE_PARSE_TIMEOUT
+    grace_until = None
     try:
-        # 3. Use FireCrawl first (handles JS-rendered pages)
-        docs = FireCrawlLoader(url).load()
-        text = docs[0].page_content.strip()
-        if len(text) > 100:
+        while True:
+            for rank, future in enumerate(futures):
+                if not future.done():
+                    break
+                text = _usable_text(future)
+                if text:
+                    return text
+            else:
+                return None
+
+            # futures[rank] is still running and outranks everything that has finished.
+            fallback = None
+            for later in futures[rank + 1:]:
+                fallback = _usable_text(later) if later.done() else None
+                if fallback:
+                    break
+            if fallback and grace_until is None:
+                grace_until = time.monotonic() + ARTICLE_PARSE_GRACE
+            limit = min(deadline, grace_until) if grace_until else deadline
+            if time.monotonic() >= limit:
+                return fallback
+            wait([f for f in futures if not f.done()], timeout=limit - time.monotonic(), return_when=FIRST_COMPLETED)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _sequential_html_parsers(url: str, html: str) -> Optional[str]:
+    for name, fn in html_parsers:
+        try:
+            text = _timed(name, fn, url, html)
+            if len(text) > 100:
+                return text
+        except Exception:
+            pass
+    return None
+
+
+def _parse_article(url: str, html: Optional[str]) -> str:
+    # Heavy parsers are imported on first use to keep app startup fast.
+    if html:
+        if ARTICLE_EXTRACTION_MODE == "race":
+            text = _race_html_parsers(url, html)
+        else:
+            text = _sequential_html_parsers(url, html)
+        if text:
             return text
-    except:
-        pass
-    
+
+    # Only reached when our own download failed or no parser found enough text.
+    fallbacks = [("firecrawl", _firecrawl_loader)]
+    if not html:
+        fallbacks.insert(0, ("webbase", _webbase_loader))
+
+    for name, loader in fallbacks:
+        try:
+            text = _timed(name, loader, url)
+            if len(text) > 100:
+                return text
+        except Exception:
+            pass
+
     return "Error: Article content is empty or could not be parsed"
+
+
+def extract_article_from_url(url: str) -> str:
+    if not is_valid_url(url):
+        return "Error: Invalid URL format"
+
+    key = normalize_url(url)
+    entry = _cache_get(key)
+    if entry and time.time() - entry["fetched_at"] < ARTICLE_CACHE_TTL:
+        return entry["text"]
+
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = get_http_session().get(url, headers=headers, timeout=ARTICLE_HTTP_TIMEOUT)
+    except Exception:
+        response = None
+
+    if entry and response is not None and response.status_code == 304:
+        _cache_put(key, {**entry, "fetched_at": time.time()})
+        return entry["text"]
+
+    html = response.text if response is not None and response.ok else None
+    text = _parse_article(url, html)
+    if not text.startswith("Error"):
+        _cache_put(key, {
+            "text": text,
+            "etag": response.headers.get("ETag") if html is not None else None,
+            "last_modified": response.headers.get("Last-Modified") if html is not None else None,
+            "fetched_at": time.time(),
+        })
+    return text
+
+
+async def aextract_article_from_url(url: str) -> str:
+    # Extractors are blocking (requests / newspaper), keep them off the event loop.
+    return await asyncio.to_thread(extract_article_from_url, url)
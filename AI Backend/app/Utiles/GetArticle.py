@@ -1,28 +1,47 @@
 from fastapi import HTTPException
-from app.Tools.URLTOOL.ArticleExtractor import extract_article_from_url
-from app.Fallback.SearchfallBack import Search_article_by_topic
-from app.Utiles.NewsCleaningService import clean_and_format_news
+from app.Tools.URLTOOL.ArticleExtractor import aextract_article_from_url
+from app.Fallback.SearchfallBack import aSearch_article_by_topic
+from app.Utiles.NewsCleaningService import aclean_and_format_news
+from app.Utiles.metrics import stage
+from app.Utiles.single_flight import SingleFlight
+from app.Utiles.url_utils import normalize_url
 
+_article_flights = SingleFlight("article")
 
-def get_article(topic: str = None, url: str = None) -> str:
+
+def _article_key(topic: str = None, url: str = None) -> str:
+    return f"url:{normalize_url(url)}" if url else "topic:" + " ".join(topic.lower().split())
+
+
+async def aget_article(topic: str = None, url: str = None) -> str:
     topic = topic.strip() if topic else None
     url = url.strip() if url and url.lower() != "string" else None
 
     if not topic and not url:
         raise HTTPException(status_code=400, detail="Provide either a topic or a valid URL.")
 
+    # Concurrent requests for the same topic / URL share one search + extract + clean run.
+    return await _article_flights.do(_article_key(topic, url), lambda: _afetch_article(topic, url))
+
+
+async def _afetch_article(topic: str = None, url: str = None) -> str:
     try:
         if url:
-            article = extract_article_from_url(url)
+            with stage("article.extract"):
+                article = await aextract_article_from_url(url)
             if article.startswith("Error"):
                 raise Exception(article)
         else:
-            article = Search_article_by_topic(topic)
+            with stage("article.search"):
+                article = await aSearch_article_by_topic(topic)
 
         if not article or len(article.strip()) < 100:
             raise Exception("No useful content retrieved.")
 
-        return clean_and_format_news(article)
+        with stage("article.clean"):
+            return await aclean_and_format_news(article)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,11 @@
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
+import re
+from functools import lru_cache
 from dotenv import load_dotenv
+from app.Utiles.llm_utils import get_llm
 import os
 load_dotenv()
 
-llm = ChatGroq(model="llama-3.1-8b-instant", temperature=0.2)
-parser = StrOutputParser()
-
-news_cleaning_prompt = PromptTemplate.from_template(
-    """
+NEWS_CLEANING_PROMPT = """
 You are a strict article formatter. Your job is to clean raw news articles and format them using **only clean Markdown**.
 
 ### ❌ What to Remove Completely:
@@ -36,9 +32,111 @@ You are a strict article formatter. Your job is to clean raw news articles and f
 ### Raw Article:
 {article}
 """
+
+
+@lru_cache(maxsize=None)
+def get_news_cleaning_chain():
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    news_cleaning_prompt = PromptTemplate.from_template(NEWS_CLEANING_PROMPT)
+    return news_cleaning_prompt | get_llm("llama-3.1-8b-instant", 0.2) | StrOutputParser()
+
+# "local" = rule-based only, "llm" = always use the LLM formatter,
+# "auto" = rule-based, falling back to the LLM only when the input looks messy.
+NEWS_CLEANER_MODE = os.getenv("NEWS_CLEANER_MODE", "auto")
+
+# LLM chatter is a short line ("Sure! Here's the cleaned article:") and is only looked for in the
+# first and last blocks, so article sentences that happen to start with "Of course," are kept.
+_LLM_MARKER = re.compile(
+    r"^\s*(sure|certainly|of course|absolutely|okay|ok)\b.{0,80}[:!]\s*$"
+    r"|^\s*here(?:'s| is| are)\b.{0,80}(cleaned|formatted|article|version|output).{0,40}:\s*$"
+    r"|^\s*#{0,6}\s*(output|cleaned article|formatted article)\s*:?\s*$",
+    re.IGNORECASE,
 )
+_SYMBOL_ONLY = re.compile(r"^\s*(\*\*|>>|-{3,}|\*{3,}|_{3,}|=+|#+)\s*$")
+_HEADING = re.compile(r"^(#{1,6})\s*(.+?)\s*#*\s*$")
+_HTML_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+_HTML_ENTITY = re.compile(r"&(nbsp|amp|lt|gt|quot|#\d+);")
+
+
+def looks_messy(article: str) -> bool:
+    """Heuristics for input the rule-based cleaner can't handle well (raw HTML, markup soup)."""
+    if len(_HTML_TAG.findall(article)) > 5 or len(_HTML_ENTITY.findall(article)) > 5:
+        return True
+    visible = [c for c in article if not c.isspace()]
+    if not visible:
+        return False
+    letters = sum(c.isalpha() for c in visible)
+    return letters / len(visible) < 0.6
+
+
+def clean_article_locally(article: str) -> str:
+    """
+    Rule-based Markdown cleanup: drops LLM chatter and stray separator lines,
+    removes repeated headings and paragraphs, and normalises whitespace and heading markers.
+    """
+    text = article.replace("\r\n", "\n").replace("\r", "\n")
+    text = text.strip().strip("`").strip()
+
+    blocks = []
+    seen_headings = set()
+    seen_paragraphs = set()
+    raw_blocks = re.split(r"\n\s*\n", text)
+    for n, block in enumerate(raw_blocks):
+        edge = n in (0, len(raw_blocks) - 1)
+        lines = []
+        for line in block.split("\n"):
+            line = re.sub(r"[ \t]+", " ", line).strip()
+            if not line or edge and _LLM_MARKER.match(line) or _SYMBOL_ONLY.match(line):
+                continue
+            if lines and line.lower() == lines[-1].lower():
+                continue
+            heading = _HEADING.match(line)
+            if heading:
+                key = heading.group(2).lower().strip("*: ")
+                if key in seen_headings:
+                    continue
+                seen_headings.add(key)
+                line = f"{heading.group(1)} {heading.group(2)}"
+            lines.append(line)
+        if not lines:
+            continue
+
+        # Headings get their own block so they are separated from the paragraph that follows.
+        paragraph = []
+        for line in lines:
+            if _HEADING.match(line):
+                if paragraph:
+                    blocks.append("\n".join(paragraph))
+                    paragraph = []
+                blocks.append(line)
+            else:
+                paragraph.append(line)
+        if paragraph:
+            key = " ".join(paragraph).lower()
+            if key not in seen_paragraphs:
+                seen_paragraphs.add(key)
+                blocks.append("\n".join(paragraph))
+
+    # A short unpunctuated first line is the headline.
+    if blocks and not blocks[0].startswith("#") and "\n" not in blocks[0] \
+            and len(blocks[0]) <= 120 and not blocks[0].endswith((".", "!", "?", ":")):
+        blocks[0] = f"# {blocks[0]}"
+
+    return "\n\n".join(blocks)
+
+
+def llm_clean_and_format_news(article: str) -> str:
+    return get_news_cleaning_chain().invoke({"article": article})
+
+async def allm_clean_and_format_news(article: str) -> str:
+    return await get_news_cleaning_chain().ainvoke({"article": article})
 
-news_cleaning_chain = news_cleaning_prompt | llm | parser
+def _use_llm(article: str) -> bool:
+    return NEWS_CLEANER_MODE == "llm" or (NEWS_CLEANER_MODE == "auto" and looks_messy(article))
 
-def clean_and_format_news(article: str) -> str:
-    return news_cleaning_chain.invoke({"article": article})
\ No newline at end of file
+async def aclean_and_format_news(article: str) -> str:
+    if _use_llm(article):
+        return await allm_clean_and_format_news(article)
+    return clean_article_locally(article)
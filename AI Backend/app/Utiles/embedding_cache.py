@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings client and caches document vectors by content hash.
+
+    Two tiers:
+    - memory: bounded LRU of recently used vectors
+    - disk:   append-only float32 file read through a numpy memmap, plus a hash -> row index
+
+    Only cache misses are sent to the underlying client. Queries are not cached
+    (providers embed queries and documents differently). Vectors are only valid for the model
+    that produced them, so each model needs its own cache_dir.
+    """
+
+    def __init__(self, underlying: Embeddings, cache_dir: Optional[str] = None, max_memory_items: int = 10000):
+        self.underlying = underlying
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._rows: Dict[str, int] = {}
+        # Rows in the vectors file that the index file accounts for; anything past them is garbage.
+        self._disk_rows = 0
+        self._dim: Optional[int] = None
+        self._mmap: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_disk_index()
+
+    # ---------- disk tier ----------
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.cache_dir, "vectors.f32")
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, "index.txt")
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.cache_dir, "meta.json")
+
+    def _load_disk_index(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path) as f:
+            self._dim = json.load(f)["dim"]
+
+        # Rows are appended to the vectors file before their keys go into the index file, so a crash
+        # can leave a torn last key, or vectors (whole or partial) without a key. Keep only rows present
+        # in both files and cut both back to them, so later appends line up again.
+        content = ""
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                content = f.read()
+        keys = content.split("\n")[:-1]
+        vectors_size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        rows = min(len(keys), vectors_size // (4 * self._dim))
+        if rows < len(keys) or not content.endswith("\n") and content:
+            logger.warning("Embedding cache: dropping keys without a stored vector after an interrupted write")
+            with open(self._index_path + ".tmp", "w") as f:
+                f.write("".join(f"{key}\n" for key in keys[:rows]))
+            os.replace(self._index_path + ".tmp", self._index_path)
+        if vectors_size != rows * self._dim * 4:
+            logger.warning("Embedding cache: dropping vector rows without a key after an interrupted write")
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(rows * self._dim * 4)
+        for row, key in enumerate(keys[:rows]):
+            self._rows[key] = row
+        self._disk_rows = rows
+
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        if self._mmap is None or row >= self._mmap.shape[0]:
+            self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._disk_rows, self._dim))
+        return np.array(self._mmap[row])
+
+    def _disk_put(self, items: List[tuple]) -> None:
+        if not self.cache_dir or not items:
+            return
+        if self._dim is None:
+            self._dim = len(items[0][1])
+            with open(self._meta_path, "w") as f:
+                json.dump({"dim": self._dim}, f)
+
+        new_items = [(key, vec) for key, vec in items if key not in self._rows and len(vec) == self._dim]
+        if len(new_items) < len([key for key, _ in items if key not in self._rows]):
+            logger.warning("Embedding cache: not storing vectors whose size differs from the cached %s dims", self._dim)
+        if not new_items:
+            return
+        start = self._disk_rows
+        # Write at the end of the accounted rows (overwriting anything a failed write left there),
+        # then the keys; a key is only ever written after its vector.
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(start * self._dim * 4)
+            f.write(np.asarray([vec for _, vec in new_items], dtype=np.float32).tobytes())
+        with open(self._index_path, "a") as f:
+            f.write("".join(f"{key}\n" for key, _ in new_items))
+        for offset, (key, _) in enumerate(new_items):
+            self._rows[key] = start + offset
+        self._disk_rows = start + len(new_items)
+
+    # ---------- memory tier ----------
+
+    def _memory_put(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector
+        if self.cache_dir:
+            vector = self._disk_get(key)
+            if vector is not None:
+                self._memory_put(key, vector)
+                self.disk_hits += 1
+                return vector
+        return None
+
+    # ---------- Embeddings interface ----------
+
+    def _split(self, texts: List[str]):
+        keys = [content_hash(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in found or key in missing:
+                    continue
+                vector = self._lookup(key)
+                if vector is None:
+                    missing[key] = text
+                else:
+                    found[key] = vector
+            self.misses += len(missing)
+        return keys, found, missing
+
+    def _merge(self, keys: List[str], found: Dict[str, np.ndarray], missing: Dict[str, str], new_vectors) -> List[List[float]]:
+        new_items = list(zip(missing.keys(), (np.asarray(v, dtype=np.float32) for v in new_vectors)))
+        with self._lock:
+            for key, vector in new_items:
+                self._memory_put(key, vector)
+                found[key] = vector
+            self._disk_put(new_items)
+        return [found[key].tolist() for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split(texts)
+        new_vectors = self.underlying.embed_documents(list(missing.values())) if missing else []
+        return self._merge(keys, found, missing, new_vectors)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split(texts)
+        new_vectors = await self.underlying.aembed_documents(list(missing.values())) if missing else []
+        return self._merge(keys, found, missing, new_vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.underlying.aembed_query(text)
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_items": len(self._memory),
+            "disk_items": len(self._rows),
+        }
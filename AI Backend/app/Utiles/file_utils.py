@@ -1,50 +1,161 @@
 import os
 import uuid
+import hashlib
 import tempfile
 import logging
-import fitz 
+import importlib.util
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, Optional, Tuple
 from app.Tools.URLTOOL.ArticleExtractor import extract_article_from_url
 
-try:
-    from pdf2image import convert_from_path
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+# Checked without importing, so the OCR stack is only loaded for scanned PDFs.
+OCR_AVAILABLE = all(importlib.util.find_spec(m) is not None for m in ("pytesseract", "PIL"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "200"))
+OCR_PAGE_TIMEOUT = float(os.getenv("OCR_PAGE_TIMEOUT", "60"))
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+UPLOAD_BLOCK_SIZE = 1024 * 1024
 
-def save_uploadfile_temp(upload_file) -> str:
-    MAX_UPLOAD_SIZE = 50 * 1024 * 1024  
-    content = upload_file.file.read()
-    size = len(content)
 
-    if size == 0:
-        raise ValueError("Uploaded file is empty.")
-    if size > MAX_UPLOAD_SIZE:
-        raise ValueError("Uploaded file exceeds 50 MB size limit.")
+def remove_temp_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
 
-    suffix = os.path.splitext(upload_file.filename)[1]
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(content)
-        tmp.flush()
+def spool_upload(upload_file, directory: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Stream an upload to a temp file (in `directory`, default the system temp dir) in UPLOAD_BLOCK_SIZE blocks.
+    The size limit is checked per block and the SHA-256 is computed on the fly.
+    Returns (temp_path, sha256); the caller owns the temp file.
+    """
+    suffix = os.path.splitext(upload_file.filename or "")[1]
+    digest = hashlib.sha256()
+    size = 0
+
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory) as tmp:
         temp_path = tmp.name
+        try:
+            while True:
+                block = upload_file.file.read(UPLOAD_BLOCK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > MAX_UPLOAD_SIZE:
+                    raise ValueError(f"Uploaded file exceeds {MAX_UPLOAD_SIZE // (1024 * 1024)} MB size limit.")
+                digest.update(block)
+                tmp.write(block)
+            if size == 0:
+                raise ValueError("Uploaded file is empty.")
+        except BaseException:
+            tmp.close()
+            remove_temp_file(temp_path)
+            raise
 
     upload_file.file.seek(0)
+    return temp_path, digest.hexdigest()
+
+
+def save_uploadfile_temp(upload_file) -> str:
+    temp_path, _ = spool_upload(upload_file)
     return temp_path
 
+
+@contextmanager
+def uploaded_temp_file(upload_file) -> Iterator[Tuple[str, str]]:
+    """Spool an upload to disk for the duration of the block, then delete it."""
+    temp_path, sha256 = spool_upload(upload_file)
+    try:
+        yield temp_path, sha256
+    finally:
+        remove_temp_file(temp_path)
+
+
+def read_upload_text(upload_file) -> str:
+    with uploaded_temp_file(upload_file) as (temp_path, _):
+        return load_file_text(temp_path)
+
+def _get_ocr_pool() -> ProcessPoolExecutor:
+    global _ocr_pool
+    if _ocr_pool is None:
+        # Not fork: the server's threads (job workers, embedding and parser pools) may hold locks
+        # that a forked child would inherit locked. Spawned workers only import this module.
+        _ocr_pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _ocr_pool
+
+
+def ocr_pdf_page(path: str, page_index: int) -> Tuple[int, str]:
+    """Render a single page and OCR it. Runs in a worker process, so only one page is in memory there."""
+    import io
+    import fitz
+    import pytesseract
+    from PIL import Image
+
+    with fitz.open(path) as doc:
+        pixmap = doc[page_index].get_pixmap(dpi=OCR_DPI)
+        image = Image.open(io.BytesIO(pixmap.tobytes("png")))
+    try:
+        text = pytesseract.image_to_string(image, timeout=OCR_PAGE_TIMEOUT)
+    except RuntimeError:
+        # pytesseract raises RuntimeError when the page exceeds the timeout.
+        text = ""
+    return page_index + 1, text
+
+
+def iter_pdf_pages(path: str) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) one page at a time (1-based), skipping pages without text.
+    Pages with no text layer are OCR'd in a process pool (up to OCR_MAX_PAGES per document);
+    their text is yielded as each one finishes, so page order is not guaranteed.
+    """
+    import fitz
+
+    pending = set()
+
+    def drain(block: bool):
+        if not pending:
+            return
+        done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.discard(future)
+            page_number, text = future.result()
+            if text.strip():
+                yield page_number, text
+
+    ocr_submitted = 0
+    with fitz.open(path) as doc:
+        for page in doc:
+            text = page.get_text()
+            if text.strip():
+                yield page.number + 1, text
+            elif OCR_AVAILABLE and ocr_submitted < OCR_MAX_PAGES:
+                pending.add(_get_ocr_pool().submit(ocr_pdf_page, path, page.number))
+                ocr_submitted += 1
+            yield from drain(block=False)
+
+    while pending:
+        yield from drain(block=True)
+
+
+def pdf_page_count(path: str) -> int:
+    import fitz
+
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
 def extract_text_from_pdf(path: str) -> str:
-    doc = fitz.open(path)
-    texts = [page.get_text() for page in doc if page.get_text()]
-
-    if texts:
-        return "\n\n".join(texts)
-
-    if OCR_AVAILABLE:
-        images = convert_from_path(path)
-        ocr_texts = [pytesseract.image_to_string(img) for img in images]
-        combined = "\n\n".join(t for t in ocr_texts if t.strip())
-        return combined
-    return "" 
+    # OCR'd pages can arrive out of order; restore page order for whole-document text.
+    return "\n\n".join(text for _, text in sorted(iter_pdf_pages(path)))
 
 def load_file_text(path: str) -> str:
     ext = os.path.splitext(path)[1].lower()
@@ -0,0 +1,51 @@
+"""
+Import-time profile of the FastAPI app.
+
+Usage (from the "AI Backend" directory):
+    python -m app.Utiles.import_profile [module] [--top N]
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and prints
+the total cold-import time plus the slowest modules by cumulative time.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+
+def profile_imports(module: str = "app.main"):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+        rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Report import-time cost of the app.")
+    arg_parser.add_argument("module", nargs="?", default="app.main")
+    arg_parser.add_argument("--top", type=int, default=25)
+    args = arg_parser.parse_args()
+
+    rows = profile_imports(args.module)
+    total = next((cum for name, _, cum in rows if name == args.module), 0)
+
+    print(f"Cold import of {args.module}: {total / 1e6:.3f}s ({len(rows)} modules)\n")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1e3:>10.1f}ms {self_us / 1e3:>8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from app.Utiles import metrics
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Queued + running jobs allowed per user, and in total.
+JOB_MAX_PER_USER = int(os.getenv("JOB_MAX_PER_USER", "3"))
+JOB_MAX_ACTIVE = int(os.getenv("JOB_MAX_ACTIVE", "100"))
+# Finished jobs (and their results) are kept this long.
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "86400"))
+# Set to persist jobs in SQLite; queued and interrupted jobs are then resumed after a restart.
+JOB_DB_PATH = os.getenv("JOB_DB_PATH")
+
+ACTIVE = ("queued", "running")
+
+logger = logging.getLogger(__name__)
+
+job_seconds = metrics.register(metrics.Histogram(
+    "app_job_duration_seconds", "Background job run time by kind and final status.", ("kind", "status")))
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLimitExceeded(Exception):
+    pass
+
+
+class JobContext:
+    """Handed to job handlers: report progress, and stop early if the job was cancelled."""
+
+    def __init__(self, jobs: "JobQueue", job_id: str):
+        self.jobs = jobs
+        self.job_id = job_id
+
+    def check_cancelled(self) -> None:
+        if self.jobs._cancel_requested(self.job_id):
+            raise JobCancelled()
+
+    def progress(self, done: int, total: Optional[int] = None) -> None:
+        self.jobs._set_progress(self.job_id, done, total)
+        self.check_cancelled()
+
+
+class JobQueue:
+    """
+    In-process job queue with a bounded pool of worker threads.
+    Handlers are plain functions handler(params, ctx) -> JSON-serialisable result, registered per kind.
+    With db_path, every state change is written through to SQLite.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, db_path: Optional[str] = JOB_DB_PATH,
+                 max_per_user: int = JOB_MAX_PER_USER, max_active: int = JOB_MAX_ACTIVE):
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.max_active = max_active
+        self._handlers: Dict[str, Callable] = {}
+        self._cleanups: Dict[str, Callable] = {}
+        self._jobs: Dict[str, Dict] = {}
+        self._cancelled = set()
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._threads = []
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, created_at REAL, data TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def register(self, kind: str, handler: Callable[[Dict, JobContext], Any],
+                 cleanup: Optional[Callable[[Dict], None]] = None) -> None:
+        """cleanup(params) runs once the job is finished, however it ended (e.g. to delete its upload)."""
+        self._handlers[kind] = handler
+        if cleanup:
+            self._cleanups[kind] = cleanup
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._threads:
+                return
+            if self._db:
+                self._resume()
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def shutdown(self) -> None:
+        """Stop workers once their current job is done. Doesn't wait: with SQLite, unfinished jobs resume on restart."""
+        with self._start_lock:
+            for _ in self._threads:
+                self._queue.put(None)
+            self._threads = []
+
+    def submit(self, kind: str, params: Dict, user: str) -> Dict:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        self._expire()
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "user": user,
+            "status": "queued",
+            "progress": None,
+            "result": None,
+            "error": None,
+            "params": params,
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self._lock:
+            active = [j for j in self._jobs.values() if j["status"] in ACTIVE]
+            if len(active) >= self.max_active:
+                raise JobLimitExceeded("Too many jobs in progress, try again later.")
+            if sum(j["user"] == user for j in active) >= self.max_per_user:
+                raise JobLimitExceeded(f"At most {self.max_per_user} jobs per user can be queued or running.")
+            self._jobs[job["id"]] = job
+            self._persist(job)
+        self._queue.put(job["id"])
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Queued jobs are dropped at once; running jobs stop at their next progress report."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == "queued":
+                self._finish(job, "cancelled")
+            elif job["status"] == "running":
+                self._cancelled.add(job_id)
+            return dict(job)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] != "queued":
+                    continue
+                job["status"] = "running"
+                job["updated_at"] = time.time()
+                self._persist(job)
+            self._run(job)
+
+    def _run(self, job: Dict) -> None:
+        start = time.perf_counter()
+        try:
+            result = self._handlers[job["kind"]](job["params"], JobContext(self, job["id"]))
+        except JobCancelled:
+            status, result, error = "cancelled", None, None
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job["id"], job["kind"])
+            status, result, error = "failed", None, str(e)
+        else:
+            status, error = "succeeded", None
+        job_seconds.observe(time.perf_counter() - start, kind=job["kind"], status=status)
+        with self._lock:
+            job["result"] = result
+            job["error"] = error
+            self._finish(job, status)
+
+    def _finish(self, job: Dict, status: str) -> None:
+        # Called with the lock held.
+        job["status"] = status
+        job["updated_at"] = time.time()
+        self._cancelled.discard(job["id"])
+        self._persist(job)
+        cleanup = self._cleanups.get(job["kind"])
+        if cleanup:
+            try:
+                cleanup(job["params"])
+            except Exception:
+                logger.exception("Cleanup for job %s failed", job["id"])
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        return job_id in self._cancelled
+
+    def _set_progress(self, job_id: str, done: int, total: Optional[int]) -> None:
+        # Progress is only kept in memory; a resumed job starts over anyway.
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job["progress"] = {"done": done, "total": total}
+                job["updated_at"] = time.time()
+
+    def _expire(self) -> None:
+        cutoff = time.time() - JOB_RESULT_TTL
+        with self._lock:
+            expired = [j["id"] for j in self._jobs.values() if j["status"] not in ACTIVE and j["updated_at"] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+            if self._db and expired:
+                self._db.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in expired])
+                self._db.commit()
+
+    def _persist(self, job: Dict) -> None:
+        if self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (id, created_at, data) VALUES (?, ?, ?)",
+                (job["id"], job["created_at"], json.dumps(job)),
+            )
+            self._db.commit()
+
+    def _resume(self) -> None:
+        rows = self._db.execute("SELECT data FROM jobs ORDER BY created_at").fetchall()
+        with self._lock:
+            for (data,) in rows:
+                job = json.loads(data)
+                if job["status"] in ACTIVE:
+                    # Jobs that were running when the process stopped are run again from the start.
+                    job["status"] = "queued"
+                    job["progress"] = None
+                    self._persist(job)
+                    self._queue.put(job["id"])
+                self._jobs[job["id"]] = job
+        logger.info("Loaded %s persisted jobs", len(rows))
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """The process-wide queue, created (and resumed, if persisted) on first use."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+            metrics.register(metrics.GaugeCallback(
+                "app_jobs", "Background jobs by status.", ("status",),
+                lambda: {(status,): n for status, n in _job_queue.counts().items()},
+            ))
+        return _job_queue
@@ -1,38 +1,153 @@
 import json
 import re
-from typing import Dict
+from typing import Dict, List
+
+_VALID_ESCAPES = set('"\\/bfnrt')
+_HEX = set("0123456789abcdefABCDEF")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_VALUE_START = set('"{[-0123456789tfn}]')
+# Runs that need no repair are copied in one step instead of character by character.
+_PLAIN_STRING_RUN = re.compile(r'(?:[^"\\\x00-\x1f]|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})+')
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+_PLAIN_VALUE_RUN = re.compile(r'[^"{}\[\],`\s]+')
+
+
+def _skip_ws(text: str, i: int) -> int:
+    return _WHITESPACE.match(text, i).end()
+
+
+def _closes_string(text: str, i: int) -> bool:
+    """Decide whether the quote at text[i] ends the string or is a stray quote inside it."""
+    j = _skip_ws(text, i + 1)
+    if j >= len(text) or text[j] in "}]:" or text.startswith("```", j):
+        return True
+    if text[j] != ",":
+        return False
+    k = _skip_ws(text, j + 1)
+    return k >= len(text) or text[k] in _VALUE_START
+
+
+def _find_start(raw_output: str) -> int:
+    fence = raw_output.find("```json")
+    start = raw_output.find("{", fence if fence != -1 else 0)
+    if start == -1 and fence != -1:
+        start = raw_output.find("{")
+    return start
+
+
+def repair_json(raw_output: str) -> str:
+    """
+    Extract the first JSON object from LLM output and repair it in a single left-to-right pass:
+    text and ``` fences around the object are dropped, raw newlines / control characters inside
+    strings are escaped, stray quotes inside strings are escaped, unknown escapes such as \\` are
+    fixed, trailing commas are removed and a truncated object is closed.
+    """
+    start = _find_start(raw_output)
+    if start == -1:
+        raise ValueError("No JSON object found in AI output.")
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    pending_comma = -1
+    text = raw_output
+    n = len(text)
+    i = start
+    while i < n:
+        ch = text[i]
+        if in_string:
+            run = _PLAIN_STRING_RUN.match(text, i)
+            if run:
+                out.append(run.group())
+                i = run.end()
+                continue
+            if ch == "\\":
+                nxt = text[i + 1] if i + 1 < n else ""
+                if nxt and nxt in _VALID_ESCAPES:
+                    out.append(ch + nxt)
+                    i += 2
+                    continue
+                if nxt == "u" and n >= i + 6 and all(c in _HEX for c in text[i + 2:i + 6]):
+                    out.append(text[i:i + 6])
+                    i += 6
+                    continue
+                if nxt == "`":
+                    out.append("`")
+                    i += 2
+                    continue
+                out.append("\\\\")
+            elif ch == '"':
+                if _closes_string(text, i):
+                    in_string = False
+                    out.append(ch)
+                else:
+                    out.append('\\"')
+            elif ch in _CONTROL_ESCAPES:
+                out.append(_CONTROL_ESCAPES[ch])
+            elif ch < " ":
+                out.append("\\u%04x" % ord(ch))
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch == '"':
+            in_string = True
+            pending_comma = -1
+            out.append(ch)
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            pending_comma = -1
+            out.append(ch)
+        elif ch in "}]":
+            if pending_comma != -1:
+                out[pending_comma] = ""
+                pending_comma = -1
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                break
+        elif ch == ",":
+            pending_comma = len(out)
+            out.append(ch)
+        elif ch in " \t\r\n":
+            i = _skip_ws(text, i)
+            continue
+        elif ch != "`":
+            run = _PLAIN_VALUE_RUN.match(text, i)
+            pending_comma = -1
+            out.append(run.group())
+            i = run.end()
+            continue
+        i += 1
+
+    # Truncated output: close whatever is still open.
+    if in_string:
+        out.append('"')
+    if pending_comma != -1:
+        out[pending_comma] = ""
+    while stack:
+        out.append(stack.pop())
+    return "".join(out)
+
 
 def extract_json(raw_output: str) -> Dict:
     """
     Safely extract JSON from AI output with code snippets.
     Escapes control characters and ensures valid JSON.
     """
-    # 1. Try to extract JSON block if present
-    json_match = re.search(r"```json(.*?)```", raw_output, re.DOTALL)
-    if json_match:
-        json_str = json_match.group(1).strip()
-    else:
-        start = raw_output.find("{")
-        end = raw_output.rfind("}")
-        if start == -1 or end == -1:
-            raise ValueError("No JSON object found in AI output.")
-        json_str = raw_output[start:end+1]
-
-    # 2. Escape unescaped quotes inside strings
-    def escape_control_chars(match):
-        inner = match.group(1)
-        inner = inner.replace("\\", "\\\\")  # escape existing backslashes first
-        inner = inner.replace('"', '\\"')    # escape quotes
-        inner = inner.replace("\n", "\\n")   # escape newlines
-        inner = inner.replace("\r", "\\r")
-        return f'"{inner}"'
-
-    # Replace all string values safely
-    json_str = re.sub(r'"(.*?)"', escape_control_chars, json_str, flags=re.DOTALL)
-
-    # 3. Parse JSON
+    # Most outputs are already valid: let the C decoder take them straight off the object span.
+    start = _find_start(raw_output)
+    end = raw_output.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(raw_output[start:end + 1], strict=False)
+            if isinstance(data, dict):
+                return data
+        except json.JSONDecodeError:
+            pass
+
     try:
-        return json.loads(json_str)
+        return json.loads(repair_json(raw_output))
     except json.JSONDecodeError as e:
-        print("Failed JSON parse. Original output snippet:", raw_output[:500])
         raise ValueError(f"JSON parsing failed: {e}")
@@ -0,0 +1,55 @@
+from typing import Dict, List, Optional
+
+from app.Utiles.jsonExtract import extract_json
+
+
+class ArrayItemParser:
+    """
+    Incremental parser for LLM token streams shaped like {"questions": [{...}, {...}]}
+    (or a bare [{...}]). feed() returns every array item object that closed in the new
+    text, so callers can validate and forward items before the rest of the output arrives.
+    Text outside the JSON (preambles, ``` fences) is ignored.
+    """
+
+    def __init__(self):
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._item: Optional[List[str]] = None
+
+    def _is_item_parent(self) -> bool:
+        return self._stack in (["{", "["], ["["])
+
+    def feed(self, text: str) -> List[Dict]:
+        items = []
+        for ch in text:
+            if self._item is not None:
+                self._item.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"' and self._stack:
+                self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._is_item_parent():
+                    self._item = ["{"]
+                self._stack.append(ch)
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if ch == "}" and self._item is not None and self._is_item_parent():
+                    item = self._decode("".join(self._item))
+                    if item is not None:
+                        items.append(item)
+                    self._item = None
+        return items
+
+    @staticmethod
+    def _decode(raw: str):
+        try:
+            return extract_json(raw)
+        except ValueError:
+            return None
@@ -0,0 +1,319 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from fastapi import HTTPException
+from langchain_core.runnables import Runnable
+
+from app.Utiles import metrics
+
+# Per-model quotas (Groq enforces both). 0 disables that limit.
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "6000"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "4"))
+# Completion tokens assumed per request until the real usage is known.
+GROQ_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("GROQ_COMPLETION_TOKENS_ESTIMATE", "512"))
+# Longest a request may wait for quota before failing with 503; clients give up long before a backlog
+# drains at 6k tokens a minute. Background jobs always wait. 0 waits indefinitely.
+GROQ_QUEUE_TIMEOUT = float(os.getenv("GROQ_QUEUE_TIMEOUT", "30"))
+
+# Lower value is served first: chat answers ahead of article cleanup ahead of quiz/interview generation.
+PRIORITIES = {"interactive": 0, "default": 1, "batch": 2}
+_POLL_SECONDS = 0.02
+
+llm_queue_seconds = metrics.register(metrics.Histogram(
+    "app_llm_queue_seconds", "Time LLM requests waited for rate-limit budget.", ("model", "priority")))
+llm_rate_limited = metrics.register(metrics.Counter(
+    "app_llm_rate_limited_total", "LLM calls rejected with 429 and retried.", ("model",)))
+llm_queue_timeouts = metrics.register(metrics.Counter(
+    "app_llm_queue_timeouts_total", "LLM calls that gave up waiting for rate-limit budget.", ("model", "priority")))
+
+
+class LLMQueueTimeout(HTTPException):
+    """The model's quota can't admit a call within GROQ_QUEUE_TIMEOUT; answered as 503 with Retry-After."""
+
+    def __init__(self, retry_after: float):
+        seconds = max(1, math.ceil(retry_after))
+        super().__init__(
+            status_code=503,
+            detail=f"The model is at its rate limit, try again in {seconds}s.",
+            headers={"Retry-After": str(seconds)},
+        )
+
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over a minute; the balance may go negative after a 429."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= amount
+
+    def pause(self, seconds: float, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class LLMScheduler:
+    """
+    Admission control for one model's quota. Callers wait in a single queue ordered by
+    (priority, arrival); the head is admitted once both the request and token buckets allow it.
+    Works from threads (acquire_sync) and coroutines (acquire). Coroutines serve requests, so one
+    that can't be admitted within `timeout` seconds leaves the queue with LLMQueueTimeout; threads
+    run background jobs, whose results are polled, and wait as long as it takes.
+    """
+
+    def __init__(self, rpm: int = GROQ_RPM, tpm: int = GROQ_TPM, timeout: float = GROQ_QUEUE_TIMEOUT):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._queue = []
+        self._arrival = itertools.count()
+
+    def _enqueue(self, priority: str):
+        entry = (PRIORITIES.get(priority, PRIORITIES["default"]), next(self._arrival))
+        with self._lock:
+            heapq.heappush(self._queue, entry)
+        return entry
+
+    def _leave(self, entry) -> None:
+        with self._lock:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+
+    def _try_admit(self, entry, tokens: int) -> float:
+        """0 when admitted, otherwise how long to wait before asking again."""
+        with self._lock:
+            if self._queue[0] != entry:
+                return _POLL_SECONDS
+            now = time.monotonic()
+            wait = max(
+                self.requests.wait_time(1, now) if self.requests else 0.0,
+                self.tokens.wait_time(tokens, now) if self.tokens else 0.0,
+            )
+            if wait > 0:
+                return wait
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+            heapq.heappop(self._queue)
+            return 0.0
+
+    def acquire_sync(self, tokens: int, priority: str = "default") -> None:
+        entry = self._enqueue(priority)
+        try:
+            while True:
+                wait = self._try_admit(entry, tokens)
+                if not wait:
+                    return
+                time.sleep(min(wait, 1.0))
+        except BaseException:
+            self._leave(entry)
+            raise
+
+    async def acquire(self, tokens: int, priority: str = "default") -> None:
+        entry = self._enqueue(priority)
+        deadline = time.monotonic() + self.timeout if self.timeout > 0 else None
+        try:
+            while True:
+                wait = self._try_admit(entry, tokens)
+                if not wait:
+                    return
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise LLMQueueTimeout(self.timeout)
+                    # At the head of the queue `wait` is exact: fail now rather than sleep into the deadline.
+                    if wait > remaining:
+                        raise LLMQueueTimeout(wait)
+                await asyncio.sleep(min(wait, 1.0))
+        except BaseException:
+            self._leave(entry)
+            raise
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the provider reports real usage."""
+        if self.tokens and actual:
+            with self._lock:
+                self.tokens.take(actual - estimated)
+
+    def pause(self, seconds: float) -> None:
+        """After a 429, hold every caller back, not just the one that was rejected."""
+        with self._lock:
+            now = time.monotonic()
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket.pause(seconds, now)
+
+
+_schedulers: Dict[str, LLMScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model: str) -> LLMScheduler:
+    """One scheduler per model, shared by every client of that model (quotas are per model)."""
+    with _schedulers_lock:
+        if model not in _schedulers:
+            _schedulers[model] = LLMScheduler()
+        return _schedulers[model]
+
+
+def is_rate_limited(exc: Exception) -> bool:
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    text = f"{type(exc).__name__} {exc}".lower()
+    return any(marker in text for marker in ("429", "rate limit", "ratelimit", "too many requests"))
+
+
+def _retry_after(exc: Exception, attempt: int) -> float:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        hinted = float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        hinted = 0.0
+    backoff = min(30.0, 2 ** attempt)
+    # Jitter so requests rejected together don't come back together.
+    return max(hinted, backoff * (0.5 + random.random()))
+
+
+def estimate_tokens(prompt: Any) -> int:
+    if hasattr(prompt, "to_string"):
+        text = prompt.to_string()
+    elif isinstance(prompt, (list, tuple)):
+        text = " ".join(str(getattr(m, "content", m)) for m in prompt)
+    else:
+        text = str(prompt)
+    return len(text) // 4 + GROQ_COMPLETION_TOKENS_ESTIMATE
+
+
+def _usage(message: Any) -> Optional[int]:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+
+class ScheduledLLM(Runnable):
+    """
+    Chat model wrapper that takes a slot from the model's LLMScheduler before each call
+    and retries 429s with jittered backoff. Composes with prompts and parsers like the model itself.
+    """
+
+    def __init__(self, client, model: str, priority: str = "default", max_retries: int = GROQ_MAX_RETRIES):
+        self.client = client
+        self.model = model
+        self.priority = priority
+        self.max_retries = max_retries
+        self.scheduler = get_scheduler(model)
+
+    def _queued(self, start: float) -> None:
+        llm_queue_seconds.observe(time.perf_counter() - start, model=self.model, priority=self.priority)
+
+    async def _acquire(self, tokens: int) -> None:
+        start = time.perf_counter()
+        try:
+            await self.scheduler.acquire(tokens, self.priority)
+        except LLMQueueTimeout:
+            llm_queue_timeouts.inc(model=self.model, priority=self.priority)
+            raise
+        finally:
+            self._queued(start)
+
+    def _rejected(self, exc: Exception, attempt: int) -> Optional[float]:
+        if attempt >= self.max_retries or not is_rate_limited(exc):
+            return None
+        llm_rate_limited.inc(model=self.model)
+        delay = _retry_after(exc, attempt)
+        self.scheduler.pause(delay)
+        return delay
+
+    def invoke(self, input, config=None, **kwargs):
+        tokens = estimate_tokens(input)
+        for attempt in itertools.count():
+            start = time.perf_counter()
+            self.scheduler.acquire_sync(tokens, self.priority)
+            self._queued(start)
+            try:
+                result = self.client.invoke(input, config, **kwargs)
+            except Exception as e:
+                delay = self._rejected(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.scheduler.settle(tokens, _usage(result))
+            return result
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        tokens = estimate_tokens(input)
+        for attempt in itertools.count():
+            await self._acquire(tokens)
+            try:
+                result = await self.client.ainvoke(input, config, **kwargs)
+            except Exception as e:
+                delay = self._rejected(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.scheduler.settle(tokens, _usage(result))
+            return result
+
+    def stream(self, input, config=None, **kwargs) -> Iterator:
+        tokens = estimate_tokens(input)
+        for attempt in itertools.count():
+            start = time.perf_counter()
+            self.scheduler.acquire_sync(tokens, self.priority)
+            self._queued(start)
+            started = False
+            try:
+                for chunk in self.client.stream(input, config, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                # A stream can only be retried if nothing was sent downstream yet.
+                delay = None if started else self._rejected(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def astream(self, input, config=None, **kwargs) -> AsyncIterator:
+        tokens = estimate_tokens(input)
+        for attempt in itertools.count():
+            await self._acquire(tokens)
+            started = False
+            try:
+                async for chunk in self.client.astream(input, config, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                delay = None if started else self._rejected(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    def __repr__(self) -> str:
+        return f"ScheduledLLM(model={self.model!r}, priority={self.priority!r})"
+
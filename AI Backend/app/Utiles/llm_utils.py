@@ -0,0 +1,65 @@
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+
+def _usage_callback(model: str):
+    """LangChain callback that feeds completion and token counts into app.Utiles.metrics."""
+    from langchain_core.callbacks import BaseCallbackHandler
+    from app.Utiles.metrics import record_llm_usage
+
+    class UsageCallback(BaseCallbackHandler):
+        def on_llm_end(self, response, **kwargs):
+            prompt_tokens = completion_tokens = 0
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += usage.get("input_tokens", 0)
+                    completion_tokens += usage.get("output_tokens", 0)
+            if not (prompt_tokens or completion_tokens):
+                token_usage = (response.llm_output or {}).get("token_usage") or {}
+                prompt_tokens = token_usage.get("prompt_tokens", 0)
+                completion_tokens = token_usage.get("completion_tokens", 0)
+            record_llm_usage(model, prompt_tokens, completion_tokens)
+
+    return UsageCallback()
+
+
+@lru_cache(maxsize=None)
+def _http_clients():
+    """One connection pool per process, shared by every model and temperature."""
+    import httpx
+    limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+    timeout = httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=10.0)
+    return httpx.Client(limits=limits, timeout=timeout), httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+@lru_cache(maxsize=None)
+def _get_client(model: str, temperature: float):
+    from langchain_groq import ChatGroq
+    http_client, http_async_client = _http_clients()
+    # Retries are done by the scheduler so a 429 also slows down every other caller.
+    return ChatGroq(
+        model=model,
+        temperature=temperature,
+        max_retries=0,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        callbacks=[_usage_callback(model)],
+    )
+
+
+@lru_cache(maxsize=None)
+def get_llm(model: str = "llama-3.1-8b-instant", temperature: float = 0.2, priority: str = "default"):
+    """
+    Return a shared chat model for (model, temperature) whose calls go through the model's
+    rate-limit scheduler at the given priority ("interactive", "default" or "batch").
+    Built on first use so importing the app stays cheap and works without network access.
+    """
+    from app.Utiles.llm_scheduler import ScheduledLLM
+    return ScheduledLLM(_get_client(model, temperature), model, priority)
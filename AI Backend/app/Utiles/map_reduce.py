@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, List, Tuple
+
+from app.Utiles.text_utils import chunk_text
+
+# Articles longer than this are split into sections and generated section by section.
+MAP_REDUCE_THRESHOLD_CHARS = int(os.getenv("MAP_REDUCE_THRESHOLD_CHARS", "12000"))
+MAP_REDUCE_SECTION_CHARS = int(os.getenv("MAP_REDUCE_SECTION_CHARS", "6000"))
+GENERATION_MAX_PARALLEL = int(os.getenv("GENERATION_MAX_PARALLEL", "4"))
+
+logger = logging.getLogger(__name__)
+
+
+def needs_map_reduce(article: str) -> bool:
+    return len(article) > MAP_REDUCE_THRESHOLD_CHARS
+
+
+def split_sections(article: str, numberOfQuestions: int) -> List[Tuple[str, int]]:
+    """
+    Split the article into (section_text, question_count) pairs.
+    When there are more sections than questions, sections are sampled evenly
+    across the document so questions don't cluster at the start.
+    """
+    chunks = chunk_text(article, chunk_size=MAP_REDUCE_SECTION_CHARS, chunk_overlap=200)
+    n = max(1, min(len(chunks), numberOfQuestions))
+    if n == 1:
+        picked = [chunks[0]]
+    else:
+        picked = [chunks[round(i * (len(chunks) - 1) / (n - 1))] for i in range(n)]
+
+    base, extra = divmod(numberOfQuestions, n)
+    return [(section, base + (1 if i < extra else 0)) for i, section in enumerate(picked)]
+
+
+def _question_key(item) -> str:
+    return re.sub(r"\W+", " ", item.question.lower()).strip()
+
+
+def merge_questions(results: List, numberOfQuestions: int) -> List:
+    """Concatenate per-section questions, dropping duplicates and trimming to the requested count."""
+    merged, seen = [], set()
+    for result in results:
+        for item in result.questions:
+            key = _question_key(item)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+    return merged[:numberOfQuestions]
+
+
+def map_reduce_questions(article: str, numberOfQuestions: int, generate_section: Callable) -> List:
+    sections = split_sections(article, numberOfQuestions)
+    with ThreadPoolExecutor(max_workers=GENERATION_MAX_PARALLEL) as pool:
+        futures = [pool.submit(generate_section, section, count) for section, count in sections]
+        results, errors = [], []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append(e)
+    if not results:
+        raise errors[0]
+    if errors:
+        logger.warning("%s of %s sections failed, their questions are missing: %s", len(errors), len(sections), errors[0])
+    return merge_questions(results, numberOfQuestions)
+
+
+async def amap_reduce_questions(
+    article: str, numberOfQuestions: int, agenerate_section: Callable[[str, int], Awaitable]
+) -> List:
+    sections = split_sections(article, numberOfQuestions)
+    semaphore = asyncio.Semaphore(GENERATION_MAX_PARALLEL)
+
+    async def run(section: str, count: int):
+        async with semaphore:
+            return await agenerate_section(section, count)
+
+    outcomes = await asyncio.gather(*(run(section, count) for section, count in sections), return_exceptions=True)
+    results = [o for o in outcomes if not isinstance(o, BaseException)]
+    if not results:
+        raise outcomes[0]
+    if len(results) < len(outcomes):
+        errors = [o for o in outcomes if isinstance(o, BaseException)]
+        logger.warning("%s of %s sections failed, their questions are missing: %s", len(errors), len(sections), errors[0])
+    return merge_questions(results, numberOfQuestions)
+
+
+async def astream_map_reduce_questions(
+    article: str, numberOfQuestions: int, astream_section: Callable[[str, int], AsyncIterator]
+) -> AsyncIterator:
+    """Streaming map-reduce: yields de-duplicated questions from whichever section produces them first."""
+    sections = split_sections(article, numberOfQuestions)
+    semaphore = asyncio.Semaphore(GENERATION_MAX_PARALLEL)
+    queue: asyncio.Queue = asyncio.Queue()
+    _done = object()
+
+    async def run(section: str, count: int):
+        try:
+            async with semaphore:
+                async for item in astream_section(section, count):
+                    await queue.put(item)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(_done)
+
+    tasks = [asyncio.create_task(run(section, count)) for section, count in sections]
+    seen, emitted, finished, errors = set(), 0, 0, []
+    try:
+        while finished < len(tasks) and emitted < numberOfQuestions:
+            item = await queue.get()
+            if item is _done:
+                finished += 1
+            elif isinstance(item, Exception):
+                errors.append(item)
+            elif _question_key(item) not in seen:
+                seen.add(_question_key(item))
+                emitted += 1
+                yield item
+        if not emitted and errors:
+            raise errors[0]
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,155 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Small in-process metrics registry rendered in the Prometheus text exposition format,
+# so /metrics works without extra dependencies.
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Stage timings of the current request (stage -> seconds), used for the Server-Timing header.
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            series = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = 'le="%s"' % _number(bound)
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge whose samples are read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+registry: List = []
+
+
+def register(metric):
+    registry.append(metric)
+    return metric
+
+
+stage_seconds = register(Histogram(
+    "app_stage_duration_seconds", "Time spent in each pipeline stage.", ("stage",)))
+http_request_seconds = register(Histogram(
+    "app_http_request_duration_seconds", "HTTP request latency until the response starts.", ("method", "route", "status")))
+search_engine_results = register(Counter(
+    "app_search_engine_results_total", "Search engine calls by outcome (success, invalid, error, timeout).", ("engine", "outcome")))
+extractor_results = register(Counter(
+    "app_article_extractor_results_total", "Article parser / loader calls by outcome (success, empty, error).", ("extractor", "outcome")))
+llm_requests = register(Counter(
+    "app_llm_requests_total", "LLM completions by model.", ("model",)))
+llm_tokens = register(Counter(
+    "app_llm_tokens_total", "LLM tokens by model and kind (prompt, completion).", ("model", "kind")))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a pipeline stage. Works around sync code and awaited calls alike."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=name)
+        timings = request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def record_llm_usage(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    llm_requests.inc(model=model)
+    if prompt_tokens:
+        llm_tokens.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        llm_tokens.inc(completion_tokens, model=model, kind="completion")
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{name.replace('.', '-')};dur={seconds * 1e3:.1f}" for name, seconds in timings.items())
+
+
+def render() -> str:
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
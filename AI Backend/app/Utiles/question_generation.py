@@ -0,0 +1,146 @@
+import hashlib
+import os
+from typing import AsyncIterator, Callable, Type
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, ValidationError
+
+from app.Utiles.jsonExtract import extract_json
+from app.Utiles.json_stream import ArrayItemParser
+from app.Utiles.map_reduce import needs_map_reduce, map_reduce_questions, amap_reduce_questions
+from app.Utiles.map_reduce import astream_map_reduce_questions
+from app.Utiles.metrics import stage
+from app.Utiles.result_cache import ResultCache, make_cache_key
+from app.Utiles.single_flight import SingleFlight
+
+load_dotenv()
+
+GENERATION_CACHE_MAX_ENTRIES = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "256"))
+GENERATION_CACHE_TTL = float(os.getenv("GENERATION_CACHE_TTL", "3600"))
+# Set to keep generations on disk (one subdirectory per generator) across restarts.
+GENERATION_CACHE_DIR = os.getenv("GENERATION_CACHE_DIR")
+
+
+class QuestionGenerator:
+    """
+    Question generation with one prompt: results are cached per article, question count and prompt
+    version, identical concurrent requests share one run, long articles are generated section by
+    section, and questions can be streamed as the model finishes each of them.
+    `get_chain` returns the prompt | llm | parser chain; `name` labels metrics stages and the cache.
+    """
+
+    def __init__(self, name: str, prompt: str, get_chain: Callable, item_model: Type[BaseModel],
+                 response_model: Type[BaseModel]):
+        self.name = name
+        self.get_chain = get_chain
+        self.item_model = item_model
+        self.response_model = response_model
+        # Changes with the prompt text, so stale generations are never served.
+        self.prompt_version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        self.cache = ResultCache(
+            max_entries=GENERATION_CACHE_MAX_ENTRIES,
+            ttl=GENERATION_CACHE_TTL,
+            disk_dir=os.path.join(GENERATION_CACHE_DIR, name) if GENERATION_CACHE_DIR else None,
+        )
+        self.flights = SingleFlight(name)
+
+    def cache_key(self, article: str, numberOfQuestions: int) -> str:
+        return make_cache_key(hashlib.sha256(article.encode("utf-8")).hexdigest(), numberOfQuestions, self.prompt_version)
+
+    def _cache_if_complete(self, key: str, result: BaseModel, numberOfQuestions: int) -> None:
+        # A short result (failed sections, duplicates merged away, items that failed validation)
+        # is returned but not cached: every later request would get it for the whole TTL.
+        if len(result.questions) >= numberOfQuestions:
+            self.cache.put(key, result.model_dump())
+
+    def _parse(self, raw_output: str) -> BaseModel:
+        try:
+            with stage(f"{self.name}.parse_json"):
+                data = extract_json(raw_output)
+        except ValueError:
+            raise ValueError(f"AI output is not valid JSON: {raw_output[:200]}...")
+
+        with stage(f"{self.name}.validate"):
+            return self.response_model(**data)
+
+    def _generate_section(self, article: str, numberOfQuestions: int) -> BaseModel:
+        with stage(f"{self.name}.llm"):
+            raw_output = self.get_chain().invoke({"article": article, "numberOfQuestions": numberOfQuestions})
+        return self._parse(raw_output)
+
+    async def _agenerate_section(self, article: str, numberOfQuestions: int) -> BaseModel:
+        with stage(f"{self.name}.llm"):
+            raw_output = await self.get_chain().ainvoke({"article": article, "numberOfQuestions": numberOfQuestions})
+        return self._parse(raw_output)
+
+    async def _astream_section(self, article: str, numberOfQuestions: int) -> AsyncIterator[BaseModel]:
+        parser = ArrayItemParser()
+        async for chunk in self.get_chain().astream({"article": article, "numberOfQuestions": numberOfQuestions}):
+            for raw_item in parser.feed(chunk):
+                try:
+                    yield self.item_model(**raw_item)
+                except ValidationError:
+                    continue
+
+    def generate(self, article: str, numberOfQuestions: int, regenerate: bool = False) -> BaseModel:
+        key = self.cache_key(article, numberOfQuestions)
+        cached = None if regenerate else self.cache.get(key)
+        if cached is not None:
+            return self.response_model(**cached)
+
+        if needs_map_reduce(article):
+            with stage(f"{self.name}.map_reduce"):
+                questions = map_reduce_questions(article, numberOfQuestions, self._generate_section)
+            result = self.response_model(questions=questions)
+        else:
+            result = self._generate_section(article, numberOfQuestions)
+        self._cache_if_complete(key, result, numberOfQuestions)
+        return result
+
+    async def agenerate(self, article: str, numberOfQuestions: int, regenerate: bool = False) -> BaseModel:
+        key = self.cache_key(article, numberOfQuestions)
+        if regenerate:
+            return await self._agenerate_and_cache(article, numberOfQuestions, key)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self.response_model(**cached)
+        # Identical requests arriving together (a trending topic) share one generation.
+        return await self.flights.do(key, lambda: self._agenerate_and_cache(article, numberOfQuestions, key))
+
+    async def _agenerate_and_cache(self, article: str, numberOfQuestions: int, key: str) -> BaseModel:
+        if needs_map_reduce(article):
+            with stage(f"{self.name}.map_reduce"):
+                questions = await amap_reduce_questions(article, numberOfQuestions, self._agenerate_section)
+            result = self.response_model(questions=questions)
+        else:
+            result = await self._agenerate_section(article, numberOfQuestions)
+        self._cache_if_complete(key, result, numberOfQuestions)
+        return result
+
+    async def astream(self, article: str, numberOfQuestions: int, regenerate: bool = False) -> AsyncIterator[BaseModel]:
+        """Yield questions one at a time as the model finishes each of them."""
+        key = self.cache_key(article, numberOfQuestions)
+        cached = None if regenerate else self.cache.get(key)
+        if cached is None and not regenerate and self.flights.in_flight(key):
+            # Someone is already generating this; replay their result instead of starting another run.
+            result = await self.flights.do(key, lambda: self._agenerate_and_cache(article, numberOfQuestions, key))
+            cached = result.model_dump()
+        if cached is not None:
+            for raw_item in cached["questions"]:
+                yield self.item_model(**raw_item)
+            return
+
+        if needs_map_reduce(article):
+            stream = astream_map_reduce_questions(article, numberOfQuestions, self._astream_section)
+        else:
+            stream = self._astream_section(article, numberOfQuestions)
+        questions = []
+        try:
+            async for question in stream:
+                questions.append(question)
+                yield question
+                if len(questions) >= numberOfQuestions:
+                    break
+        finally:
+            await stream.aclose()
+        self._cache_if_complete(key, self.response_model(questions=questions), numberOfQuestions)
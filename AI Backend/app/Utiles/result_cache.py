@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def make_cache_key(*parts: Any) -> str:
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU + TTL cache for JSON-serialisable results, with an optional disk tier
+    (one JSON file per key under disk_dir) that survives restarts.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _fresh(self, entry: Dict) -> bool:
+        return time.time() - entry["created_at"] < self.ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._fresh(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["value"]
+            self._entries.pop(key, None)
+
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                with open(self._disk_path(key)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry and self._fresh(entry):
+                with self._lock:
+                    self._store(key, entry)
+                    self.hits += 1
+                return entry["value"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key: str, entry: Dict) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, key: str, value: Any) -> None:
+        entry = {"created_at": time.time(), "value": value}
+        with self._lock:
+            self._store(key, entry)
+        if self.disk_dir:
+            tmp_path = self._disk_path(key) + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._disk_path(key))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from app.Utiles import metrics
+
+single_flight_calls = metrics.register(metrics.Counter(
+    "app_single_flight_calls_total", "Coalesced calls by group and role (leader runs, follower shares).", ("group", "role")))
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async calls: the first caller for a key starts the work,
+    callers arriving while it is in flight await the same result (or exception).
+    Nothing is kept once the call finishes; caching results is the caller's job.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+            single_flight_calls.inc(group=self.group, role="leader")
+        else:
+            single_flight_calls.inc(group=self.group, role="follower")
+
+        self._waiters[key] += 1
+        try:
+            # shield: one client disconnecting must not cancel the work for the others.
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._calls.get(key) is task and self._waiters[key] == 1:
+                task.cancel()
+            raise
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
@@ -0,0 +1,47 @@
+import json
+import logging
+from typing import AsyncIterator, Callable, Dict
+
+from fastapi import Request
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: Dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def format_ndjson(event: Dict) -> str:
+    return json.dumps(event) + "\n"
+
+
+async def question_events(questions: AsyncIterator) -> AsyncIterator[Dict]:
+    """One "question" event per generated question, then "done" with the count."""
+    count = 0
+    try:
+        async for question in questions:
+            count += 1
+            yield {"event": "question", "data": question.model_dump()}
+        yield {"event": "done", "data": {"count": count}}
+    finally:
+        await questions.aclose()
+
+
+async def stream_events(
+    request: Request, events: AsyncIterator[Dict], formatter: Callable[[Dict], str] = format_sse
+) -> AsyncIterator[str]:
+    """
+    Relay service events to the client. Errors become a final "error" event (the status line
+    is already sent), and a client disconnect closes the service generator, which cancels the
+    upstream LLM stream instead of letting it run to completion for nobody.
+    """
+    try:
+        async for event in events:
+            if await request.is_disconnected():
+                logger.info("Client disconnected from %s, cancelling generation", request.url.path)
+                break
+            yield formatter(event)
+    except Exception as e:
+        yield formatter({"event": "error", "data": str(e)})
+    finally:
+        await events.aclose()
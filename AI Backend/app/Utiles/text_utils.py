@@ -1,5 +1,25 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import Dict, Iterable, Iterator, Tuple
+
+
+def _splitter(chunk_size: int, chunk_overlap: int):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
 
 def chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 200):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    splitter = _splitter(chunk_size, chunk_overlap)
     return splitter.split_text(text)
+
+
+def iter_chunks(
+    pages: Iterable[Tuple[int, str]], chunk_size: int = 1000, chunk_overlap: int = 200
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    Incrementally chunk (page_number, text) pairs, yielding (chunk, {"page": page_number}).
+    Pages are split independently so each chunk maps to exactly one page.
+    """
+    splitter = _splitter(chunk_size, chunk_overlap)
+    for page_number, text in pages:
+        for chunk in splitter.split_text(text):
+            yield chunk, {"page": page_number}
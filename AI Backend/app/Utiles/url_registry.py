@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.Utiles.vectorstore_utils import VECTORSTORE_DIR, delete_from_namespace, namespace_drop_hooks
+
+# How long (seconds) an ingested URL is reused before it is evicted and re-fetched.
+URL_INGEST_TTL = float(os.getenv("URL_INGEST_TTL", "3600"))
+REGISTRY_FILE = os.path.join(VECTORSTORE_DIR, "url_registry.json")
+
+# normalized url -> {"namespace", "content_hash", "ids", "ingested_at"}
+url_registry: Dict[str, Dict] = {}
+_registry_lock = threading.Lock()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _save_registry() -> None:
+    os.makedirs(os.path.dirname(REGISTRY_FILE), exist_ok=True)
+    with open(REGISTRY_FILE + ".tmp", "w") as f:
+        json.dump(url_registry, f)
+    os.replace(REGISTRY_FILE + ".tmp", REGISTRY_FILE)
+
+
+def _load_registry() -> None:
+    if os.path.exists(REGISTRY_FILE):
+        with open(REGISTRY_FILE) as f:
+            url_registry.update(json.load(f))
+
+
+def get_fresh_entry(url_key: str, namespace: str) -> Optional[Dict]:
+    entry = url_registry.get(url_key)
+    if entry and entry["namespace"] == namespace and time.time() - entry["ingested_at"] < URL_INGEST_TTL:
+        return entry
+    return None
+
+
+def find_by_hash(url_key: str, namespace: str, text_hash: str) -> Optional[Dict]:
+    """Entry for this URL whose stored content is unchanged, so its vectors can be reused."""
+    entry = url_registry.get(url_key)
+    if entry and entry["namespace"] == namespace and entry["content_hash"] == text_hash:
+        return entry
+    return None
+
+
+def touch(url_key: str) -> None:
+    with _registry_lock:
+        url_registry[url_key]["ingested_at"] = time.time()
+        _save_registry()
+
+
+def register(url_key: str, namespace: str, text_hash: str, ids: List[str]) -> None:
+    with _registry_lock:
+        old = url_registry.get(url_key)
+        url_registry[url_key] = {
+            "namespace": namespace,
+            "content_hash": text_hash,
+            "ids": ids,
+            "ingested_at": time.time(),
+        }
+        _save_registry()
+    if old:
+        # Content changed: the previous vectors for this URL are stale. Deleted outside the registry
+        # lock, which namespace drop hooks take while the vectorstore holds its own locks.
+        delete_from_namespace(old["namespace"], old["ids"])
+
+
+def evict_expired(keep: Optional[str] = None) -> int:
+    """Drop expired URLs and their vectors; `keep` is the URL being served right now."""
+    now = time.time()
+    with _registry_lock:
+        expired = [url_registry.pop(k) for k, e in list(url_registry.items())
+                   if k != keep and now - e["ingested_at"] >= URL_INGEST_TTL]
+        if expired:
+            _save_registry()
+    for entry in expired:
+        delete_from_namespace(entry["namespace"], entry["ids"])
+    return len(expired)
+
+
+def forget_namespace(namespace: str) -> None:
+    """The namespace was deleted (e.g. evicted with VECTORSTORE_EVICTION=drop): its URLs must be re-ingested."""
+    with _registry_lock:
+        stale = [k for k, e in url_registry.items() if e["namespace"] == namespace]
+        for url_key in stale:
+            del url_registry[url_key]
+        if stale:
+            _save_registry()
+
+
+_load_registry()
+namespace_drop_hooks.append(forget_namespace)
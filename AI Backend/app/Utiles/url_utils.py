@@ -0,0 +1,19 @@
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = {"fbclid", "gclid", "ref"}
+
+
+def _is_tracking(param: str) -> bool:
+    param = param.lower()
+    return param.startswith(_TRACKING_PREFIXES) or param in _TRACKING_PARAMS
+
+
+def normalize_url(url: str) -> str:
+    parsed = urlparse(url.strip())
+    query = [
+        (k, v) for k, v in sorted(parse_qsl(parsed.query, keep_blank_values=True))
+        if not _is_tracking(k)
+    ]
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, "", urlencode(query), ""))
@@ -1,59 +1,943 @@
+import asyncio
+import json
+import logging
+import math
+import random
+import re
+import time
 import uuid
-import faiss
 import os
-from typing import Dict, List, Optional
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_community.docstore.in_memory import InMemoryDocstore
+import pickle
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-vectorstores: Dict[str, FAISS] = {}
+from app.Utiles import metrics
+
+# faiss and the langchain vectorstore stack are imported on first use, not at app startup.
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+vectorstores: Dict[str, "FAISS"] = {}
 metadata_store: Dict[str, List[Dict]] = {}
 
-embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-try:
-    EMB_DIM = len(embeddings.embed_query("dimension test"))
-except Exception:
-    EMB_DIM = 768 
-
-def get_or_create_vectorstore(namespace: str) -> FAISS:
-    if namespace in vectorstores:
-        return vectorstores[namespace]
-    
-    index = faiss.IndexFlatL2(EMB_DIM)
+# Namespaces are saved here and reloaded lazily on first use: a full snapshot (index + store)
+# plus an append-only log of the batches added since, folded into a new snapshot once the log
+# holds more than VECTORSTORE_COMPACT_RATIO of the snapshot's vectors (and at least VECTORSTORE_COMPACT_MIN).
+VECTORSTORE_DIR = os.getenv("VECTORSTORE_DIR", os.path.join("data", "vectorstores"))
+VECTORSTORE_COMPACT_RATIO = float(os.getenv("VECTORSTORE_COMPACT_RATIO", "0.25"))
+VECTORSTORE_COMPACT_MIN = int(os.getenv("VECTORSTORE_COMPACT_MIN", "1000"))
+# Each snapshot's index is saved as index-<snapshot id>.faiss and named by store.pkl, so replacing
+# store.pkl switches index and store at once. INDEX_FILE is the name used by older snapshots.
+INDEX_FILE = "index.faiss"
+STORE_FILE = "store.pkl"
+LOG_FILE = "added.log"
+
+# Ingestion embeds chunks in batches with a bounded number of requests in flight.
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+
+# Loaded namespaces are kept under this many MB (index + docstore); the least recently used
+# are evicted beyond it. 0 disables the limit. Eviction "unload" keeps the on-disk snapshot
+# (reloaded on next use), "drop" deletes the namespace.
+VECTORSTORE_MEMORY_BUDGET_MB = float(os.getenv("VECTORSTORE_MEMORY_BUDGET_MB", "1024"))
+VECTORSTORE_EVICTION = os.getenv("VECTORSTORE_EVICTION", "unload")
+
+# Namespaces reaching ANN_PROMOTE_AT vectors are rebuilt in the background as an approximate
+# index: ANN_INDEX "ivf" or "hnsw", with ANN_QUANTIZER "none", "sq8" or "pq". 0 disables promotion.
+ANN_PROMOTE_AT = int(os.getenv("ANN_PROMOTE_AT", "50000"))
+ANN_INDEX = os.getenv("ANN_INDEX", "ivf")
+ANN_QUANTIZER = os.getenv("ANN_QUANTIZER", "sq8")
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "16"))
+ANN_HNSW_M = int(os.getenv("ANN_HNSW_M", "32"))
+ANN_EF_SEARCH = int(os.getenv("ANN_EF_SEARCH", "128"))
+ANN_PQ_M = int(os.getenv("ANN_PQ_M", "64"))
+ANN_TRAIN_SAMPLE = int(os.getenv("ANN_TRAIN_SAMPLE", "100000"))
+# Comma-separated namespaces that stay flat: they are only queried through search_by_ids, which
+# scores reconstructed vectors (lossy once quantized), so promoting them buys nothing.
+ANN_EXCLUDE = {name.strip() for name in os.getenv("ANN_EXCLUDE", "url_namespace").split(",") if name.strip()}
+
+logger = logging.getLogger(__name__)
+
+metrics.register(metrics.GaugeCallback(
+    "app_vectorstore_vectors", "Vectors held by each loaded namespace.", ("namespace",),
+    lambda: {(namespace, ): vs.index.ntotal for namespace, vs in list(vectorstores.items())},
+))
+metrics.register(metrics.GaugeCallback(
+    "app_vectorstore_bytes", "Estimated memory held by each loaded namespace.", ("namespace", "kind"),
+    lambda: {
+        (namespace, kind): usage[f"{kind}_bytes"]
+        for namespace, usage in memory_report()["namespaces"].items()
+        for kind in ("index", "docstore")
+    },
+))
+
+# Namespaces whose index is still backed by a read-only memory map.
+_mmapped: set = set()
+_persist_lock = threading.Lock()
+# Id of each namespace's current on-disk snapshot (log records name the snapshot they extend),
+# and the number of vectors logged since it was written.
+_snapshot_ids: Dict[str, str] = {}
+_logged_vectors: Dict[str, int] = {}
+
+# Held around index writes, so a background promotion can swap the index without losing vectors.
+# When both are needed, a namespace lock is taken before _memory_lock (eviction only try-locks).
+_write_locks: Dict[str, threading.RLock] = {}
+_write_locks_guard = threading.Lock()
+
+
+def _namespace_lock(namespace: str) -> threading.RLock:
+    with _write_locks_guard:
+        return _write_locks.setdefault(namespace, threading.RLock())
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join("data", "embedding_cache"))
+
+
+def _embedding_cache_dir() -> str:
+    # Cached vectors are only valid for the model that produced them: one directory per model.
+    return os.path.join(EMBEDDING_CACHE_DIR, re.sub(r"[^A-Za-z0-9._-]", "_", EMBEDDING_MODEL))
+
+
+@lru_cache(maxsize=None)
+def get_embeddings():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from app.Utiles.embedding_cache import CachedEmbeddings
+
+    return CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL),
+        cache_dir=_embedding_cache_dir(),
+        max_memory_items=int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000")),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_embedding_dim() -> int:
+    """
+    Embedding size for new indexes, without a network probe:
+    EMBEDDING_DIM if set, else the dimension recorded by the embedding cache, else 768 (embedding-001).
+    """
+    if os.getenv("EMBEDDING_DIM"):
+        return int(os.getenv("EMBEDDING_DIM"))
+    meta_path = os.path.join(_embedding_cache_dir(), "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            return json.load(f)["dim"]
+    return 768
+
+def _namespace_dir(namespace: str) -> str:
+    return os.path.join(VECTORSTORE_DIR, namespace)
+
+
+def _index_file(snapshot_id: str) -> str:
+    return f"index-{snapshot_id}.faiss"
+
+
+def persist_vectorstore(namespace: str) -> None:
+    """
+    Write a full snapshot of a namespace (index, docstore, id map and metadata_store) and empty its log.
+    The new index goes to its own file and store.pkl is swapped in last, so a crash at any point
+    leaves either the old snapshot or the new one.
+    """
+    import faiss
+
+    with _namespace_lock(namespace), _persist_lock:
+        vectorstore = vectorstores.get(namespace)
+        if vectorstore is None:
+            return
+
+        ns_dir = _namespace_dir(namespace)
+        os.makedirs(ns_dir, exist_ok=True)
+        store_path = os.path.join(ns_dir, STORE_FILE)
+        snapshot_id = uuid.uuid4().hex
+        index_file = _index_file(snapshot_id)
+        index_path = os.path.join(ns_dir, index_file)
+
+        faiss.write_index(vectorstore.index, index_path + ".tmp")
+        os.replace(index_path + ".tmp", index_path)
+        with open(store_path + ".tmp", "wb") as f:
+            pickle.dump({
+                "snapshot_id": snapshot_id,
+                "index_file": index_file,
+                "docstore": vectorstore.docstore._dict,
+                "index_to_docstore_id": vectorstore.index_to_docstore_id,
+                "metadata": metadata_store.get(namespace, []),
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(store_path + ".tmp", store_path)
+        # Older index files (and temp files of interrupted snapshots) are no longer referenced.
+        for name in os.listdir(ns_dir):
+            if name.startswith("index") and name != index_file:
+                os.remove(os.path.join(ns_dir, name))
+        # Records left in the log (e.g. after a crash right here) name the old snapshot and are ignored on load.
+        open(os.path.join(ns_dir, LOG_FILE), "wb").close()
+        _snapshot_ids[namespace] = snapshot_id
+        _logged_vectors[namespace] = 0
+
+
+def _log_added(namespace: str, start: int, texts: List[str], metadatas: List[Dict], ids: List[str], vectors) -> None:
+    """
+    Record one added batch on disk. Called with the namespace lock held, right after the batch
+    went into the index at position `start`; costs O(batch) instead of rewriting the snapshot.
+    """
+    import numpy as np
+
+    if namespace not in _snapshot_ids:
+        # Nothing on disk to extend yet.
+        persist_vectorstore(namespace)
+        return
+    with _persist_lock, open(os.path.join(_namespace_dir(namespace), LOG_FILE), "ab") as f:
+        pickle.dump({
+            "snapshot_id": _snapshot_ids[namespace],
+            "start": start,
+            "texts": texts,
+            "metadatas": metadatas,
+            "ids": ids,
+            "vectors": np.asarray(vectors, dtype="float32"),
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+    _logged_vectors[namespace] = _logged_vectors.get(namespace, 0) + len(ids)
+    ntotal = vectorstores[namespace].index.ntotal
+    if _logged_vectors[namespace] > max(VECTORSTORE_COMPACT_MIN, VECTORSTORE_COMPACT_RATIO * ntotal):
+        with metrics.stage("vectorstore.compact"):
+            persist_vectorstore(namespace)
+
+
+def _read_log(namespace: str, snapshot_id: str, ntotal: int) -> Tuple[List[Dict], bool]:
+    """
+    Log records extending snapshot `snapshot_id`, in order. The second value is False when the log
+    also held something unusable (records of an older snapshot, a gap, or a torn last record).
+    """
+    log_path = os.path.join(_namespace_dir(namespace), LOG_FILE)
+    records, clean = [], True
+    if not os.path.exists(log_path):
+        return records, clean
+    with open(log_path, "rb") as f:
+        while True:
+            try:
+                record = pickle.load(f)
+            except EOFError:
+                break
+            except Exception:
+                logger.warning("Namespace '%s': ignoring torn record at the end of its log", namespace)
+                clean = False
+                break
+            if record["snapshot_id"] != snapshot_id or record["start"] != ntotal:
+                clean = False
+                continue
+            records.append(record)
+            ntotal += len(record["ids"])
+    return records, clean
+
+
+def _register(namespace: str, vectorstore: "FAISS", metadata: List[Dict], docstore_bytes: int) -> None:
+    with _memory_lock:
+        vectorstores[namespace] = vectorstore
+        metadata_store[namespace] = metadata
+        _docstore_bytes[namespace] = docstore_bytes
+
+
+def _load_snapshot(namespace: str) -> Optional["FAISS"]:
+    ns_dir = _namespace_dir(namespace)
+    store_path = os.path.join(ns_dir, STORE_FILE)
+    if not os.path.exists(store_path):
+        return None
+
+    import faiss
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    with open(store_path, "rb") as f:
+        state = pickle.load(f)
+    index_path = os.path.join(ns_dir, state.get("index_file", INDEX_FILE))
+    if not os.path.exists(index_path):
+        return None
+    snapshot_id = state.get("snapshot_id", "")
+    records, clean = _read_log(namespace, snapshot_id, len(state["index_to_docstore_id"]))
+
+    if records:
+        # Logged batches are replayed into the index, so it has to be read into RAM.
+        index = faiss.read_index(index_path)
+    else:
+        io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        try:
+            index = faiss.read_index(index_path, io_flags | getattr(faiss, "IO_FLAG_MMAP_IFC", 0))
+        except RuntimeError:
+            # IVF indexes can't use the in-place (IFC) mapping; their inverted lists are mapped instead.
+            index = faiss.read_index(index_path, io_flags)
+    if index.ntotal != len(state["index_to_docstore_id"]):
+        # Only possible with an older snapshot torn between its two files: positions and ids no longer match.
+        raise RuntimeError(
+            f"Namespace '{namespace}': index holds {index.ntotal} vectors but the store maps "
+            f"{len(state['index_to_docstore_id'])}; the snapshot is inconsistent and has to be re-ingested."
+        )
+
     vectorstore = FAISS(
-        embedding_function=embeddings,
+        embedding_function=get_embeddings(),
         index=index,
-        docstore=InMemoryDocstore(),
-        index_to_docstore_id={},
+        docstore=InMemoryDocstore(state["docstore"]),
+        index_to_docstore_id=state["index_to_docstore_id"],
     )
-    vectorstores[namespace] = vectorstore
-    metadata_store[namespace] = []
+    metadata = state["metadata"]
+    for record in records:
+        vectorstore.add_embeddings(
+            list(zip(record["texts"], record["vectors"])), metadatas=record["metadatas"], ids=record["ids"]
+        )
+        metadata.extend(record["metadatas"])
+
+    _register(namespace, vectorstore, metadata, sum(
+        _doc_bytes(doc.page_content, doc.metadata) for doc in vectorstore.docstore._dict.values()
+    ))
+    if not records:
+        _mmapped.add(namespace)
+    _snapshot_ids[namespace] = snapshot_id
+    _logged_vectors[namespace] = sum(len(record["ids"]) for record in records)
+    if not clean or not snapshot_id or "index_file" not in state:
+        persist_vectorstore(namespace)
+    return vectorstore
+
+
+def load_vectorstore(namespace: str) -> Optional["FAISS"]:
+    """
+    Return the namespace from memory, or reload it from disk.
+    The index file is memory-mapped, so reload cost does not grow with corpus size
+    (unless batches logged since the last snapshot have to be replayed into it).
+    """
+    vectorstore = vectorstores.get(namespace)
+    if vectorstore is None:
+        # Check again under the lock: only one caller may load the namespace.
+        with _namespace_lock(namespace):
+            vectorstore = vectorstores.get(namespace)
+            loaded = vectorstore is None
+            if loaded:
+                vectorstore = _load_snapshot(namespace)
+                if vectorstore is None:
+                    return None
+        if loaded:
+            _touch(namespace)
+            enforce_memory_budget(keep=namespace)
+            maybe_promote(namespace)
+            return vectorstore
+    _touch(namespace)
     return vectorstore
 
-def ingest_file_to_faiss(path: str, namespace: Optional[str] = "default", source_name: Optional[str] = None) -> Dict:
-    from .file_utils import load_file_text
-    from .text_utils import chunk_text
+
+def _ensure_writable(namespace: str, vectorstore: "FAISS") -> None:
+    # A memory-mapped index is read-only (clone_index would keep the mapped view),
+    # so read it fully into RAM before the first write. Called with the namespace lock held.
+    if namespace in _mmapped:
+        import faiss
+
+        index_path = os.path.join(_namespace_dir(namespace), _index_file(_snapshot_ids[namespace]))
+        vectorstore.index = faiss.read_index(index_path)
+        _mmapped.discard(namespace)
+
+
+def get_or_create_vectorstore(namespace: str) -> "FAISS":
+    vectorstore = load_vectorstore(namespace)
+    if vectorstore is not None:
+        return vectorstore
+
+    import faiss
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    with _namespace_lock(namespace):
+        vectorstore = vectorstores.get(namespace)
+        if vectorstore is None:
+            vectorstore = FAISS(
+                embedding_function=get_embeddings(),
+                index=faiss.IndexFlatL2(get_embedding_dim()),
+                docstore=InMemoryDocstore(),
+                index_to_docstore_id={},
+            )
+            _register(namespace, vectorstore, [], 0)
+    _touch(namespace)
+    return vectorstore
+
+
+def _add_embedded(namespace: str, vectorstore: "FAISS", texts: List[str], vectors, metadatas: List[Dict], ids: List[str]) -> List[str]:
+    with _namespace_lock(namespace):
+        _ensure_writable(namespace, vectorstore)
+        start = vectorstore.index.ntotal
+        added = vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+        metadata_store[namespace].extend(metadatas)
+        with metrics.stage("ingest.persist"):
+            _log_added(namespace, start, texts, metadatas, ids, vectors)
+    _account(namespace, texts, metadatas)
+    return added
+
+
+async def aadd_texts_to_namespace(namespace: str, texts: List[str], metadatas: List[Dict], ids: List[str]) -> List[str]:
+    # Everything that may load, persist or wait for a namespace lock runs off the event loop.
+    with _pinned(namespace):
+        vectorstore = await asyncio.to_thread(get_or_create_vectorstore, namespace)
+        # Embed before taking the write lock; only the (fast) index add happens under it.
+        vectors = await get_embeddings().aembed_documents(texts)
+        added = await asyncio.to_thread(_add_embedded, namespace, vectorstore, texts, vectors, metadatas, ids)
+    await asyncio.to_thread(enforce_memory_budget, namespace)
+    maybe_promote(namespace)
+    return added
+
+
+def delete_from_namespace(namespace: str, ids: List[str]) -> int:
+    with _pinned(namespace):
+        vectorstore = load_vectorstore(namespace)
+        if vectorstore is None:
+            return 0
+
+        with _namespace_lock(namespace):
+            positions = _positions(namespace, vectorstore)
+            ids = [i for i in ids if i in positions]
+            if not ids:
+                return 0
+            doomed = {positions[i] for i in ids}
+            _ensure_writable(namespace, vectorstore)
+            removed = [vectorstore.docstore.search(i) for i in ids]
+            if _is_flat(vectorstore.index):
+                # FAISS.delete drops the vectors by position and remaps index_to_docstore_id.
+                vectorstore.delete(ids)
+            else:
+                _delete_rebuilding(vectorstore, ids)
+            _delete_generation[namespace] = _delete_generation.get(namespace, 0) + 1
+            # metadata_store is in index order: drop the deleted positions (equal metadata of other chunks stays).
+            metadata_store[namespace] = [m for p, m in enumerate(metadata_store.get(namespace, [])) if p not in doomed]
+            # Positions shifted, so logged batches no longer line up: write a full snapshot.
+            persist_vectorstore(namespace)
+            _account(namespace, [doc.page_content for doc in removed], [doc.metadata for doc in removed], sign=-1)
+    return len(ids)
+
+
+# namespace -> (vectorstore, delete generation, docstore id -> index position), extended as vectors are added.
+_id_positions: Dict[str, Tuple["FAISS", int, Dict[str, int]]] = {}
+
+
+def _positions(namespace: str, vectorstore: "FAISS") -> Dict[str, int]:
+    # Called with the namespace lock held. Deletes shift positions, so they start the map over.
+    generation = _delete_generation.get(namespace, 0)
+    cached = _id_positions.get(namespace)
+    if cached is None or cached[0] is not vectorstore or cached[1] != generation:
+        cached = _id_positions[namespace] = (vectorstore, generation, {})
+    positions = cached[2]
+    mapping = vectorstore.index_to_docstore_id
+    for position in range(len(positions), len(mapping)):
+        positions[mapping[position]] = position
+    return positions
+
+
+def similarity_search(namespace: str, query_vector: List[float], k: int) -> Optional[List]:
+    """
+    The k documents nearest to query_vector, or None if the namespace doesn't exist.
+    Searched under the namespace lock: an add grows the index before it maps the new positions to ids.
+    """
+    vectorstore = load_vectorstore(namespace)
+    if vectorstore is None:
+        return None
+    with _namespace_lock(namespace):
+        return vectorstore.similarity_search_by_vector(query_vector, k=k)
+
+
+def search_by_ids(namespace: str, query_vector: List[float], ids: Iterable[str], k: int) -> List:
+    """
+    The k documents nearest to query_vector among `ids` only (e.g. the chunks of one URL).
+    Only those vectors are scored, exactly, whatever the index type: cost doesn't grow with the
+    namespace, and an approximate index can't miss them.
+    """
+    import numpy as np
+
+    vectorstore = load_vectorstore(namespace)
+    if vectorstore is None:
+        return []
+    with _namespace_lock(namespace):
+        positions = _positions(namespace, vectorstore)
+        found = [positions[doc_id] for doc_id in ids if doc_id in positions]
+        if not found:
+            return []
+        vectors = vectorstore.index.reconstruct_batch(np.array(found, dtype="int64"))
+        docs = [vectorstore.docstore.search(vectorstore.index_to_docstore_id[position]) for position in found]
+    distances = ((vectors - np.asarray(query_vector, dtype="float32")) ** 2).sum(axis=1)
+    return [docs[i] for i in np.argsort(distances)[:k]]
+
+
+def list_documents(namespace: str) -> Dict[str, int]:
+    """source -> number of chunks, for every document in the namespace."""
+    vectorstore = load_vectorstore(namespace)
+    if vectorstore is None:
+        return {}
+    counts: Dict[str, int] = {}
+    with _namespace_lock(namespace):
+        for doc in vectorstore.docstore._dict.values():
+            source = doc.metadata.get("source", "unknown")
+            counts[source] = counts.get(source, 0) + 1
+    return counts
+
+
+def delete_document(namespace: str, source: str) -> int:
+    """Remove every chunk of one document (by its `source` metadata). Returns the chunks removed."""
+    vectorstore = load_vectorstore(namespace)
+    if vectorstore is None:
+        return 0
+    with _namespace_lock(namespace):
+        ids = [doc_id for doc_id, doc in vectorstore.docstore._dict.items() if doc.metadata.get("source") == source]
+    return delete_from_namespace(namespace, ids)
+
+
+# --- Memory budget -------------------------------------------------------------------------
+
+# Loaded namespaces, least recently used first.
+_last_used: "OrderedDict[str, float]" = OrderedDict()
+# Estimated bytes of docstore entries (text + metadata + object overhead) per loaded namespace.
+_docstore_bytes: Dict[str, int] = {}
+_memory_lock = threading.RLock()
+# Namespaces with a write in progress (an ingestion embeds between index adds), never evicted.
+_pins: Dict[str, int] = {}
+# Called with the namespace name when one is deleted, so registries pointing into it can forget it.
+namespace_drop_hooks: List[Callable[[str], None]] = []
+
+_DOC_OVERHEAD_BYTES = 400
+
+
+def _doc_bytes(text: str, metadata: Dict) -> int:
+    return len(text.encode("utf-8")) + len(repr(metadata)) + _DOC_OVERHEAD_BYTES
+
+
+def _account(namespace: str, texts: Iterable[str], metadatas: Iterable[Dict], sign: int = 1) -> None:
+    delta = sum(_doc_bytes(text, metadata) for text, metadata in zip(texts, metadatas))
+    with _memory_lock:
+        _docstore_bytes[namespace] = max(0, _docstore_bytes.get(namespace, 0) + sign * delta)
+
+
+@contextmanager
+def _pinned(namespace: str) -> Iterator[None]:
+    with _memory_lock:
+        _pins[namespace] = _pins.get(namespace, 0) + 1
+    try:
+        yield
+    finally:
+        with _memory_lock:
+            _pins[namespace] -= 1
+            if not _pins[namespace]:
+                del _pins[namespace]
+
+
+def _touch(namespace: str) -> None:
+    with _memory_lock:
+        _last_used[namespace] = time.time()
+        _last_used.move_to_end(namespace)
+
+
+def _index_bytes(index) -> int:
+    """Approximate resident size of a FAISS index: vector codes plus IVF lists / HNSW graph overhead."""
+    import faiss
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        # codes + list ids + direct map, and the coarse centroids.
+        return index.ntotal * (ivf.code_size + 16) + ivf.nlist * ivf.d * 4
+    if hasattr(index, "hnsw"):
+        return _index_bytes(faiss.downcast_index(index.storage)) + index.hnsw.neighbors.size() * 4 + index.ntotal * 16
+    return index.ntotal * getattr(index, "code_size", index.d * 4)
+
+
+def namespace_memory(namespace: str) -> Optional[Dict]:
+    vectorstore = vectorstores.get(namespace)
+    if vectorstore is None:
+        return None
+    mapped = namespace in _mmapped
+    index_bytes = _index_bytes(vectorstore.index)
+    docstore_bytes = _docstore_bytes.get(namespace, 0)
+    return {
+        "vectors": vectorstore.index.ntotal,
+        "index_type": type(vectorstore.index).__name__,
+        # A memory-mapped index lives in the page cache, which the OS can reclaim; it is reported but not budgeted.
+        "memory_mapped": mapped,
+        "index_bytes": 0 if mapped else index_bytes,
+        "mapped_index_bytes": index_bytes if mapped else 0,
+        "docstore_bytes": docstore_bytes,
+        "total_bytes": (0 if mapped else index_bytes) + docstore_bytes,
+        "idle_seconds": round(time.time() - _last_used.get(namespace, time.time()), 1),
+    }
+
+
+def memory_report() -> Dict:
+    with _memory_lock:
+        namespaces = {ns: namespace_memory(ns) for ns in _last_used if ns in vectorstores}
+    return {
+        "budget_bytes": int(VECTORSTORE_MEMORY_BUDGET_MB * 1024 * 1024),
+        "eviction": VECTORSTORE_EVICTION,
+        "total_bytes": sum(usage["total_bytes"] for usage in namespaces.values()),
+        "namespaces": namespaces,
+    }
+
+
+def _forget(namespace: str) -> None:
+    # Called with the namespace lock and _memory_lock held.
+    vectorstores.pop(namespace, None)
+    metadata_store.pop(namespace, None)
+    _mmapped.discard(namespace)
+    _last_used.pop(namespace, None)
+    _docstore_bytes.pop(namespace, None)
+    _snapshot_ids.pop(namespace, None)
+    _logged_vectors.pop(namespace, None)
+    _id_positions.pop(namespace, None)
+
+
+class NamespaceBusy(Exception):
+    pass
+
+
+def _unload(namespace: str) -> bool:
+    # Called with the namespace lock held.
+    if namespace not in vectorstores:
+        return False
+    # Every add is already on disk (snapshot + log) unless nothing was ever written for this namespace.
+    if namespace not in _snapshot_ids:
+        persist_vectorstore(namespace)
+    with _memory_lock:
+        # Writers pin before they look the namespace up, so once this check passes none is using it.
+        if namespace in _pins:
+            raise NamespaceBusy(f"Namespace '{namespace}' is being written.")
+        _forget(namespace)
+    return True
+
+
+def _delete(namespace: str) -> bool:
+    # Called with the namespace lock held.
+    with _memory_lock:
+        if namespace in _pins:
+            raise NamespaceBusy(f"Namespace '{namespace}' is being written.")
+        loaded = namespace in vectorstores
+        _forget(namespace)
+    ns_dir = _namespace_dir(namespace)
+    existed = os.path.isdir(ns_dir)
+    with _persist_lock:
+        shutil.rmtree(ns_dir, ignore_errors=True)
+    return loaded or existed
+
+
+def _dropped(namespace: str) -> None:
+    # Hooks take their own locks, so they run with no vectorstore lock held.
+    for hook in namespace_drop_hooks:
+        hook(namespace)
+    logger.info("Deleted namespace '%s'", namespace)
+
+
+def unload_namespace(namespace: str) -> bool:
+    """Drop a namespace from memory; its snapshot stays on disk and is reloaded on next use."""
+    with _namespace_lock(namespace):
+        unloaded = _unload(namespace)
+    if unloaded:
+        logger.info("Unloaded namespace '%s'", namespace)
+    return unloaded
+
+
+def delete_namespace(namespace: str) -> bool:
+    """Remove a namespace from memory and disk. Raises NamespaceBusy while it is being written."""
+    if namespace in ("", ".", "..") or os.path.basename(namespace) != namespace:
+        raise ValueError(f"Invalid namespace name {namespace!r}")
+    with _namespace_lock(namespace):
+        deleted = _delete(namespace)
+    _dropped(namespace)
+    return deleted
+
+
+def enforce_memory_budget(keep: Optional[str] = None) -> List[str]:
+    """
+    Evict least recently used namespaces until the loaded ones fit the budget. Never evicts `keep`,
+    a pinned namespace, or one whose write lock is held (it is being written right now).
+    """
+    if VECTORSTORE_MEMORY_BUDGET_MB <= 0:
+        return []
+    budget = VECTORSTORE_MEMORY_BUDGET_MB * 1024 * 1024
+    victims = []
+    with _memory_lock:
+        total = memory_report()["total_bytes"]
+        for namespace in _last_used:
+            if total <= budget:
+                break
+            if namespace == keep or namespace in _pins or namespace not in vectorstores:
+                continue
+            victims.append(namespace)
+            total -= namespace_memory(namespace)["total_bytes"]
+
+    # Evicted after releasing _memory_lock: unloading may write a snapshot, and drop hooks take their own locks.
+    drop = VECTORSTORE_EVICTION == "drop"
+    evicted = []
+    for namespace in victims:
+        lock = _namespace_lock(namespace)
+        # Never wait for a namespace that is being written; it stays loaded until a later pass.
+        if not lock.acquire(blocking=False):
+            continue
+        try:
+            removed = _delete(namespace) if drop else _unload(namespace)
+        except NamespaceBusy:
+            continue
+        finally:
+            lock.release()
+        if removed:
+            evicted.append(namespace)
+            if drop:
+                _dropped(namespace)
+    if evicted:
+        logger.info("Memory budget: evicted %s", ", ".join(evicted))
+    return evicted
+
+
+# --- Approximate index promotion ------------------------------------------------------------
+
+_promotion_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ann-promote")
+_promoting: set = set()
+# Bumped on every delete; a promotion built from an older snapshot is thrown away.
+_delete_generation: Dict[str, int] = {}
+
+
+def _is_flat(index) -> bool:
+    import faiss
+
+    return isinstance(index, faiss.IndexFlat)
+
+
+def ann_factory_string(dim: int, ntotal: int, kind: str = ANN_INDEX, quantizer: str = ANN_QUANTIZER) -> str:
+    codec = {"none": "Flat", "sq8": "SQ8", "pq": f"PQ{ANN_PQ_M}"}[quantizer]
+    if quantizer == "pq" and dim % ANN_PQ_M:
+        raise ValueError(f"ANN_PQ_M={ANN_PQ_M} must divide the embedding dimension {dim}")
+    if kind == "hnsw":
+        return f"HNSW{ANN_HNSW_M}" if quantizer == "none" else f"HNSW{ANN_HNSW_M}_{codec}"
+    # ~4 * sqrt(n) inverted lists is the usual starting point for IVF.
+    nlist = int(min(65536, max(64, 4 * math.sqrt(ntotal))))
+    return f"IVF{nlist},{codec}"
+
+
+def build_ann_index(vectors, kind: str = ANN_INDEX, quantizer: str = ANN_QUANTIZER):
+    """Train (on at most ANN_TRAIN_SAMPLE vectors) and fill an approximate L2 index."""
+    import faiss
+    import numpy as np
+
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    index = faiss.index_factory(vectors.shape[1], ann_factory_string(vectors.shape[1], len(vectors), kind, quantizer))
+    codec = faiss.downcast_index(index.storage) if hasattr(index, "hnsw") else index
+    if hasattr(codec, "do_polysemous_training"):
+        # Only used by polysemous search, which we don't do; it multiplies PQ training time ~10x.
+        codec.do_polysemous_training = False
+    if not index.is_trained:
+        sample = vectors
+        if len(vectors) > ANN_TRAIN_SAMPLE:
+            sample = vectors[np.random.default_rng(0).choice(len(vectors), ANN_TRAIN_SAMPLE, replace=False)]
+        index.train(sample)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = ANN_NPROBE
+        # Needed by reconstruct(), which deletions rebuild from.
+        ivf.make_direct_map()
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ANN_EF_SEARCH
+    index.add(vectors)
+    return index
+
+
+def _delete_rebuilding(vectorstore: "FAISS", ids: List[str]) -> None:
+    """
+    IVF keeps its ids on removal and HNSW can't remove at all, while FAISS.delete assumes
+    positions shift down; so approximate indexes are refilled (training kept) without the deleted vectors.
+    """
+    import faiss
+    import numpy as np
+
+    doomed = set(ids)
+    kept = [pos for pos, doc_id in sorted(vectorstore.index_to_docstore_id.items()) if doc_id not in doomed]
+    old = vectorstore.index
+    index = faiss.clone_index(old)
+    index.reset()
+    if kept:
+        index.add(old.reconstruct_batch(np.array(kept, dtype="int64")))
+    vectorstore.index = index
+    vectorstore.index_to_docstore_id = {i: vectorstore.index_to_docstore_id[pos] for i, pos in enumerate(kept)}
+    vectorstore.docstore.delete(ids)
+
+
+def maybe_promote(namespace: str) -> bool:
+    """Schedule a background promotion once a flat namespace (not in ANN_EXCLUDE) reaches ANN_PROMOTE_AT vectors."""
+    vectorstore = vectorstores.get(namespace)
+    if not ANN_PROMOTE_AT or namespace in ANN_EXCLUDE or vectorstore is None or vectorstore.index.ntotal < ANN_PROMOTE_AT:
+        return False
+    if not _is_flat(vectorstore.index):
+        return False
+    with _write_locks_guard:
+        if namespace in _promoting:
+            return False
+        _promoting.add(namespace)
+    _promotion_pool.submit(_promote, namespace, vectorstore)
+    return True
+
+
+def _promote(namespace: str, vectorstore: "FAISS") -> None:
+    try:
+        with _namespace_lock(namespace):
+            flat = vectorstore.index
+            generation = _delete_generation.get(namespace, 0)
+            snapshot = flat.ntotal
+            # Copy under the lock: a concurrent add may reallocate the flat index's storage.
+            vectors = flat.reconstruct_n(0, snapshot)
+
+        # Training and filling take seconds to minutes; searches keep using the flat index meanwhile.
+        with metrics.stage("ann.build"):
+            index = build_ann_index(vectors)
+        del vectors
+
+        with _namespace_lock(namespace):
+            if vectorstores.get(namespace) is not vectorstore or _delete_generation.get(namespace, 0) != generation:
+                logger.info("Promotion of '%s' abandoned: namespace changed while building", namespace)
+                return
+            flat = vectorstore.index
+            if flat.ntotal > snapshot:
+                # Vectors ingested while the new index was being built.
+                index.add(flat.reconstruct_n(snapshot, flat.ntotal - snapshot))
+            vectorstore.index = index
+            _mmapped.discard(namespace)
+            persist_vectorstore(namespace)
+        logger.info("Promoted '%s' to %s (%s vectors)", namespace, type(index).__name__, index.ntotal)
+    except Exception:
+        logger.exception("Promotion of '%s' failed", namespace)
+    finally:
+        with _write_locks_guard:
+            _promoting.discard(namespace)
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    text = f"{type(exc).__name__} {exc}".lower()
+    return any(marker in text for marker in ("429", "rate limit", "ratelimit", "resourceexhausted", "resource_exhausted", "quota"))
+
+
+def _embed_batch_with_retry(texts: List[str]) -> List[List[float]]:
+    embedder = get_embeddings()
+    for attempt in range(EMBED_MAX_RETRIES + 1):
+        try:
+            with metrics.stage("ingest.embed_batch"):
+                return embedder.embed_documents(texts)
+        except Exception as e:
+            if attempt == EMBED_MAX_RETRIES or not _is_rate_limited(e):
+                raise
+            # Exponential backoff with jitter so parallel batches don't retry in lockstep.
+            time.sleep(min(30, 2 ** attempt) * (0.5 + random.random()))
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest_chunks(
+    namespace: str,
+    items: Iterable[Tuple[str, Dict, str]],
+    total: Union[int, Callable[[], Optional[int]], None] = None,
+    on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+) -> int:
+    """
+    Embed (text, metadata, id) items in batches of EMBED_BATCH_SIZE with at most
+    EMBED_CONCURRENCY requests in flight, adding each batch to the index as soon as it is embedded.
+    `items` may be a generator, so producing chunks overlaps with embedding and memory stays flat;
+    `total` may then be a callable returning the current estimate of the item count.
+    Returns the number of chunks added.
+    """
+    # Pinned so the memory budget never unloads the namespace between batches.
+    with _pinned(namespace):
+        vectorstore = get_or_create_vectorstore(namespace)
+        batches = _batched(items, EMBED_BATCH_SIZE)
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY) as pool:
+            in_flight = {}
+
+            def submit_next() -> bool:
+                batch = next(batches, None)
+                if batch is None:
+                    return False
+                in_flight[pool.submit(_embed_batch_with_retry, [text for text, _, _ in batch])] = batch
+                return True
+
+            for _ in range(EMBED_CONCURRENCY):
+                if not submit_next():
+                    break
+
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    batch = in_flight.pop(future)
+                    vectors = future.result()
+                    # Each batch is logged to disk as it is added, so an interrupted ingestion keeps what it embedded.
+                    with metrics.stage("ingest.index_add"):
+                        _add_embedded(
+                            namespace, vectorstore,
+                            [text for text, _, _ in batch], vectors,
+                            [metadata for _, metadata, _ in batch], [chunk_id for _, _, chunk_id in batch],
+                        )
+                    done += len(batch)
+                    expected = total() if callable(total) else total
+                    logger.info("Embedded %s/%s chunks into '%s'", done, expected if expected is not None else "?", namespace)
+                    if on_progress:
+                        on_progress(done, expected)
+                    submit_next()
+
+    enforce_memory_budget(keep=namespace)
+    maybe_promote(namespace)
+
+    return done
+
+
+def ingest_file_to_faiss(
+    path: str,
+    namespace: Optional[str] = "default",
+    source_name: Optional[str] = None,
+    on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+) -> Dict:
+    from .file_utils import iter_pdf_pages, pdf_page_count
+    from .text_utils import iter_chunks
 
     base_name = os.path.basename(path)
     if not source_name:
         name, ext = os.path.splitext(base_name)
         source_name = f"{name}_{str(uuid.uuid4())}{ext}"
 
-    text = load_file_text(path)
-    if not text.strip():
-        raise ValueError("No text extracted from file.")
+    page_count = pdf_page_count(path)
+    parsed = {"pages": 0, "chunks": 0, "finished": False}
+
+    def pages():
+        for page in iter_pdf_pages(path):
+            parsed["pages"] += 1
+            yield page
 
-    chunks = chunk_text(text)
-    ids = [str(uuid.uuid4()) for _ in chunks]
+    # Pages are parsed lazily while earlier batches are being embedded.
+    def items():
+        for i, (chunk, page_meta) in enumerate(iter_chunks(pages())):
+            parsed["chunks"] += 1
+            yield chunk, {"source": source_name, "chunk_index": i, **page_meta}, str(uuid.uuid4())
+        parsed["finished"] = True
 
-    vectorstore = get_or_create_vectorstore(namespace)
-    metadatas = [{"source": source_name, "chunk_index": i} for i in range(len(chunks))]
-    vectorstore.add_texts(chunks, metadatas=metadatas, ids=ids)
-    metadata_store[namespace].extend(metadatas)
+    def total() -> Optional[int]:
+        # Exact once every page is parsed; until then extrapolated from the chunks per page so far.
+        if parsed["finished"]:
+            return parsed["chunks"]
+        if not parsed["pages"]:
+            return None
+        return max(parsed["chunks"], round(parsed["chunks"] / parsed["pages"] * page_count))
+
+    with metrics.stage("ingest.file"):
+        added = ingest_chunks(namespace, items(), total=total, on_progress=on_progress)
+    if not added:
+        raise ValueError("No text extracted from file.")
 
     return {
         "namespace": namespace,
         "source": source_name,
-        "chunks": len(chunks),
-        "ids_added": len(ids),
+        "chunks": added,
+        "ids_added": added,
     }
@@ -1,7 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager
 import uvicorn
 import os
+import time
 
 # Ai-News-Project
 
@@ -9,8 +12,23 @@ import os
 from app.Router.InterviewQGeneration_router import router as interviewQGeneration_router
 from app.Router.QuizGeneration_router import router as quizGeneration_router
 from app.Router.ChatWithDocs_router import router as chatWithDocs_router
+from app.Router.Jobs_router import router as jobs_router
+from app.Router.Admin_router import router as admin_router
+from app.Service.Jobs import jobs
+from app.Utiles import metrics
 
-app = FastAPI()
+# Add a Server-Timing header (per-stage durations) to every response; clients can also
+# ask for it per request with "X-Request-Timing: 1".
+REQUEST_TIMING_HEADER = os.getenv("REQUEST_TIMING_HEADER", "0") == "1"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the background job workers (and resume persisted jobs) with the server.
+    jobs.start()
+    yield
+    jobs.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS setup
 app.add_middleware(
@@ -21,15 +39,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _route_label(request: Request) -> str:
+    """Route template (e.g. /api/chat/chat-url) so metrics don't get one series per concrete URL."""
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    template = getattr(route, "path_format", route.path)
+    try:
+        rendered = template.format(**request.scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = request.scope["path"]
+    # Routes from included routers may only know their path relative to the router prefix.
+    return path[:-len(rendered)] + template if rendered and path.endswith(rendered) else template
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    timings = {}
+    token = metrics.request_timings.set(timings)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.request_timings.reset(token)
+    elapsed = time.perf_counter() - start
+
+    metrics.http_request_seconds.observe(
+        elapsed, method=request.method, route=_route_label(request), status=response.status_code
+    )
+    if REQUEST_TIMING_HEADER or request.headers.get("X-Request-Timing") == "1":
+        response.headers["Server-Timing"] = metrics.server_timing_header({**timings, "total": elapsed})
+    return response
+
 # Routers
 app.include_router(interviewQGeneration_router, prefix="/api", tags=["interview"])
 app.include_router(quizGeneration_router, prefix="/api", tags=["quiz"])
 app.include_router(chatWithDocs_router, prefix="/api/chat", tags=["chat"])
+app.include_router(jobs_router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(admin_router, prefix="/api/admin", tags=["admin"])
 
 @app.get("/")
 def read_root():
     return {"message": "FastAPI is working"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))  # fallback to 8000 for local
     uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=True)
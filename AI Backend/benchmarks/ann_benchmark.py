@@ -0,0 +1,90 @@
+"""
+Recall, latency and memory of the approximate index configurations against the flat baseline.
+
+Usage (from the "AI Backend" directory):
+    python -m benchmarks.ann_benchmark [--vectors 50000] [--dim 768] [--queries 200] [--k 10]
+        [--config ivf-sq8 --config hnsw-none ...] [--nprobe 16] [--ef-search 128]
+
+Vectors are a synthetic mixture of Gaussian clusters (unit-normalised, like text embeddings);
+queries are fresh points drawn around the same clusters. Every index is built with
+vectorstore_utils.build_ann_index, the function namespace promotion uses, and compared with
+an exact IndexFlatL2 over the same vectors. Reports build time, index memory (as the admin
+memory endpoint estimates it), single-query p50 / p95 latency and recall@k.
+"""
+import argparse
+import time
+
+import numpy as np
+
+CONFIGS = ["ivf-none", "ivf-sq8", "ivf-pq", "hnsw-none", "hnsw-sq8", "hnsw-pq"]
+
+
+def synthetic_embeddings(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = np.random.default_rng(0).standard_normal((clusters, dim)).astype("float32")
+    points = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype("float32")
+    return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+
+def search_each(index, queries: np.ndarray, k: int):
+    """Search one query at a time, as the chat endpoints do."""
+    labels, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, found = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        labels.append(found[0])
+    return np.array(labels), np.array(latencies) * 1e3
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--vectors", type=int, default=50000)
+    arg_parser.add_argument("--dim", type=int, default=768)
+    arg_parser.add_argument("--clusters", type=int, default=500)
+    arg_parser.add_argument("--queries", type=int, default=200)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--config", action="append", choices=CONFIGS)
+    arg_parser.add_argument("--nprobe", type=int, default=None, help="override ANN_NPROBE for IVF")
+    arg_parser.add_argument("--ef-search", type=int, default=None, help="override ANN_EF_SEARCH for HNSW")
+    args = arg_parser.parse_args()
+
+    import faiss
+    from app.Utiles.vectorstore_utils import _index_bytes, ann_factory_string, build_ann_index
+
+    vectors = synthetic_embeddings(args.vectors, args.dim, args.clusters, seed=1)
+    queries = synthetic_embeddings(args.queries, args.dim, args.clusters, seed=2)
+
+    flat = faiss.IndexFlatL2(args.dim)
+    start = time.perf_counter()
+    flat.add(vectors)
+    build = time.perf_counter() - start
+    truth, latencies = search_each(flat, queries, args.k)
+
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, recall@{args.k}\n")
+    print(f"{'config':<12} {'factory':<18} {'build s':>8} {'memory MB':>10} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7}")
+
+    def report(name, factory, index, build, found, latencies):
+        print(f"{name:<12} {factory:<18} {build:>8.2f} {_index_bytes(index) / 2**20:>10.1f} "
+              f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 95):>8.3f} {recall_at_k(found, truth):>7.3f}")
+
+    report("flat", "Flat", flat, build, truth, latencies)
+    for config in args.config or CONFIGS:
+        kind, quantizer = config.split("-")
+        start = time.perf_counter()
+        index = build_ann_index(vectors, kind, quantizer)
+        build = time.perf_counter() - start
+        if args.nprobe and kind == "ivf":
+            faiss.extract_index_ivf(index).nprobe = args.nprobe
+        if args.ef_search and kind == "hnsw":
+            index.hnsw.efSearch = args.ef_search
+        found, latencies = search_each(index, queries, args.k)
+        report(config, ann_factory_string(args.dim, args.vectors, kind, quantizer), index, build, found, latencies)
+
+
+if __name__ == "__main__":
+    main()
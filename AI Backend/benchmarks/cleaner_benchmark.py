@@ -0,0 +1,88 @@
+"""
+Compare the rule-based article cleaner with the LLM cleaner.
+
+Usage (from the "AI Backend" directory):
+    python -m benchmarks.cleaner_benchmark [--runs 3] [--file article.txt ...]
+
+Reports per-article latency of clean_article_locally and, when GROQ_API_KEY is set,
+of the LLM formatter, plus how similar the two outputs are (difflib ratio).
+"""
+import argparse
+import difflib
+import os
+import statistics
+import time
+
+from app.Utiles.NewsCleaningService import clean_article_locally, llm_clean_and_format_news, looks_messy
+
+SAMPLE_ARTICLES = {
+    "search-snippet": """Sure! Here's the cleaned version:
+
+Kubernetes 1.30 Released
+Kubernetes 1.30 Released
+
+**
+
+The   Kubernetes project   released version 1.30 with improvements to   pod scheduling,
+sidecar containers and   structured authentication configuration.
+
+## What's new
+## What's new
+- Sidecar containers graduate to beta
+- Structured authorization configuration
+
+The   Kubernetes project   released version 1.30 with improvements to   pod scheduling,
+sidecar containers and   structured authentication configuration.
+---
+""",
+    "extracted-page": """Understanding Python's GIL
+
+The Global Interpreter Lock (GIL) is a mutex that protects access to Python objects,
+preventing multiple threads from executing Python bytecodes at once.
+
+### Why it exists
+CPython's memory management is not thread-safe. Reference counting would otherwise
+need fine-grained locking on every object.
+
+### Working around it
+Use multiprocessing for CPU-bound work, or native extensions that release the GIL.
+""",
+}
+
+
+def timed(fn, article):
+    start = time.perf_counter()
+    output = fn(article)
+    return time.perf_counter() - start, output
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--runs", type=int, default=3)
+    arg_parser.add_argument("--file", action="append", default=[])
+    args = arg_parser.parse_args()
+
+    articles = dict(SAMPLE_ARTICLES)
+    for path in args.file:
+        with open(path) as f:
+            articles[os.path.basename(path)] = f.read()
+
+    use_llm = bool(os.getenv("GROQ_API_KEY"))
+    print(f"{'article':<20} {'messy':<6} {'local ms':>9} {'llm ms':>9} {'similarity':>10}")
+    for name, article in articles.items():
+        local_times, llm_times = [], []
+        local_out = llm_out = None
+        for _ in range(args.runs):
+            seconds, local_out = timed(clean_article_locally, article)
+            local_times.append(seconds)
+            if use_llm:
+                seconds, llm_out = timed(llm_clean_and_format_news, article)
+                llm_times.append(seconds)
+
+        llm_ms = f"{statistics.median(llm_times) * 1e3:9.1f}" if llm_times else f"{'n/a':>9}"
+        similarity = f"{difflib.SequenceMatcher(None, local_out, llm_out).ratio():10.2f}" if llm_out else f"{'n/a':>10}"
+        print(f"{name:<20} {str(looks_messy(article)):<6} {statistics.median(local_times) * 1e3:9.2f} {llm_ms} {similarity}")
+
+
+if __name__ == "__main__":
+    main()
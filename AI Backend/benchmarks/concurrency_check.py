@@ -0,0 +1,84 @@
+"""
+Check that simultaneous requests overlap instead of queueing behind each other's LLM calls.
+
+Usage (from the "AI Backend" directory):
+    python -m benchmarks.concurrency_check [--requests 8] [--llm-latency 1.0] [--scenario quiz-topic ...]
+
+Uses the same offline fakes and ASGI transport as the e2e benchmark, with a deliberately slow
+fake LLM. For each scenario one request is timed alone, then N requests with distinct inputs
+(so nothing is coalesced or cached) are sent at once. If the handlers never block the event
+loop, the batch takes about as long as one request; run sequentially it would take N times as
+long. Exits non-zero when a batch takes more than --max-ratio times the single request.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+SCENARIOS = ["quiz-topic", "interview-topic", "quiz-url", "chat-on-docs", "chat-url"]
+
+
+async def main_async(args) -> bool:
+    import httpx
+    from benchmarks import fakes
+    from benchmarks.e2e_benchmark import build_requests
+
+    # Fast token rate: the latency under test is the time to first token, paid once per call.
+    fakes.install(llm_latency=args.llm_latency, tokens_per_second=1e6, embed_latency=0.01, search_latency=0.05)
+    from app.main import app
+
+    print(f"{args.requests} simultaneous requests, fake LLM latency {args.llm_latency}s\n")
+    print(f"{'scenario':<18} {'single s':>9} {'batch s':>9} {'ratio':>7}  result")
+    passed = True
+    with fakes.PageServer() as pages:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=300) as client:
+            if any(s == "chat-on-docs" for s in args.scenario or SCENARIOS):
+                await client.post(**build_requests("upload-file", pages)(-1))
+
+            for scenario in args.scenario or SCENARIOS:
+                make_request = build_requests(scenario, pages)
+
+                start = time.perf_counter()
+                response = await client.post(**make_request(0))
+                single = time.perf_counter() - start
+                response.raise_for_status()
+
+                start = time.perf_counter()
+                responses = await asyncio.gather(*(client.post(**make_request(i)) for i in range(1, args.requests + 1)))
+                batch = time.perf_counter() - start
+                for response in responses:
+                    response.raise_for_status()
+
+                ratio = batch / single
+                ok = ratio <= args.max_ratio
+                passed &= ok
+                print(f"{scenario:<18} {single:>9.2f} {batch:>9.2f} {ratio:>7.2f}  {'ok' if ok else 'SERIALISED'}")
+    return passed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--requests", type=int, default=8)
+    arg_parser.add_argument("--llm-latency", type=float, default=1.0, help="fake time to first token (s)")
+    arg_parser.add_argument("--max-ratio", type=float, default=2.0, help="allowed batch / single request time")
+    arg_parser.add_argument("--scenario", action="append", choices=SCENARIOS)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VECTORSTORE_DIR"] = os.path.join(tmp, "vectorstores")
+        os.environ["EMBEDDING_CACHE_DIR"] = os.path.join(tmp, "embedding_cache")
+        os.environ.pop("GENERATION_CACHE_DIR", None)
+        # No provider quota: the scheduler must not be what spaces the calls out.
+        os.environ["GROQ_RPM"] = "0"
+        os.environ["GROQ_TPM"] = "0"
+        os.environ.setdefault("GROQ_API_KEY", "offline")
+        os.environ.setdefault("GOOGLE_API_KEY", "offline")
+        passed = asyncio.run(main_async(args))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
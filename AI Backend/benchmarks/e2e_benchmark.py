@@ -0,0 +1,172 @@
+"""
+Offline end-to-end benchmark of every router endpoint.
+
+Usage (from the "AI Backend" directory):
+    python -m benchmarks.e2e_benchmark [--requests 20] [--concurrency 4] [--scenario quiz-url ...]
+        [--llm-latency 0.25] [--tokens-per-second 500] [--embed-latency 0.05] [--search-latency 0.15]
+        [--repeat-inputs] [--llm-rpm 0] [--llm-tpm 0]
+
+Groq, Google embeddings, the search engines and the web are replaced by the local fakes in
+benchmarks/fakes.py, and requests go through the ASGI app in-process (httpx.ASGITransport),
+so results depend only on this code and the configured fake latencies. Each request uses a
+fresh topic / URL unless --repeat-inputs is given (which measures the warm-cache path).
+--llm-rpm / --llm-tpm make the fake LLM enforce a provider quota and give the app's
+scheduler the same limits; by default both are unlimited.
+
+Reports p50 / p95 / p99 latency and throughput per endpoint scenario, then per pipeline
+stage (search, extract, clean, generate, retrieve, ingest, llm, embed, ...).
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+SCENARIOS = [
+    "quiz-topic", "quiz-url", "quiz-file", "quiz-stream",
+    "interview-topic", "interview-url", "interview-file", "interview-stream",
+    "upload-file", "chat-on-docs", "chat-on-docs-stream", "chat-url", "chat-url-stream",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> str:
+    ms = [s * 1e3 for s in samples]
+    return f"{len(ms):>6} {percentile(ms, 50):>9.1f} {percentile(ms, 95):>9.1f} {percentile(ms, 99):>9.1f}"
+
+
+def build_pdf(seed: str, pages: int = 3) -> bytes:
+    import fitz
+    from benchmarks.fakes import paragraph
+
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(72, 72, 540, 760), paragraph(f"{seed}-{n}", 180), fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def build_requests(scenario: str, pages) -> Callable[[int], Dict]:
+    """Return i -> httpx request kwargs for the scenario."""
+    def pdf(i):
+        return {"files": {"file": (f"doc-{scenario}-{i}.pdf", build_pdf(f"{scenario}-{i}"), "application/pdf")}}
+
+    quiz_like = scenario.split("-")[0]
+    path = {"quiz": "/api/quiz-question", "interview": "/api/interview-question"}.get(quiz_like)
+    if scenario in ("quiz-topic", "interview-topic"):
+        return lambda i: {"url": path, "json": {"topic": f"{scenario} subject {i}", "numberOfQuestions": 5}}
+    if scenario in ("quiz-url", "interview-url"):
+        return lambda i: {"url": path, "json": {"url": pages.url(f"{scenario}-{i}"), "numberOfQuestions": 5}}
+    if scenario in ("quiz-stream", "interview-stream"):
+        return lambda i: {"url": path + "/stream", "json": {"url": pages.url(f"{scenario}-{i}"), "numberOfQuestions": 5}}
+    if scenario in ("quiz-file", "interview-file"):
+        return lambda i: {"url": path + "-file", "data": {"numberOfQuestions": "5"}, **pdf(i)}
+    if scenario == "upload-file":
+        return lambda i: {"url": "/api/chat/upload-file", **pdf(i)}
+    if scenario in ("chat-on-docs", "chat-on-docs-stream"):
+        suffix = "/stream" if scenario.endswith("stream") else ""
+        return lambda i: {"url": "/api/chat/chat-on-docs" + suffix, "json": {"topic": f"scheduler question {i}"}}
+    if scenario in ("chat-url", "chat-url-stream"):
+        suffix = "/stream" if scenario.endswith("stream") else ""
+        return lambda i: {"url": "/api/chat/chat-url" + suffix,
+                          "json": {"topic": f"what about the kernel {i}", "url": pages.url(f"{scenario}-{i}")}}
+    raise ValueError(f"Unknown scenario {scenario!r}")
+
+
+async def run_scenario(client, make_request, requests: int, concurrency: int, repeat_inputs: bool):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def one(i: int):
+        kwargs = make_request(0 if repeat_inputs else i)
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(**kwargs)
+            elapsed = time.perf_counter() - start
+        if response.status_code >= 400 or b'"event": "error"' in response.content:
+            errors.append(f"{response.status_code}: {response.text[:200]}")
+        else:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def main_async(args) -> None:
+    import httpx
+    from benchmarks import fakes
+
+    fakes.install(
+        llm_latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        embed_latency=args.embed_latency,
+        search_latency=args.search_latency,
+        llm_rpm=args.llm_rpm,
+        llm_tpm=args.llm_tpm,
+    )
+    from app.main import app
+
+    print(f"requests/scenario: {args.requests}, concurrency: {args.concurrency}, "
+          f"llm latency: {args.llm_latency}s @ {args.tokens_per_second} tok/s\n")
+    print(f"{'scenario':<22} {'ok':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'errors':>7}")
+
+    with fakes.PageServer() as pages:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            scenarios = args.scenario or SCENARIOS
+            if any(s.startswith("chat-on-docs") for s in scenarios) and "upload-file" not in scenarios:
+                # chat-on-docs needs something in the default namespace.
+                await client.post(**build_requests("upload-file", pages)(-1))
+            fakes.recorder.reset()
+
+            for scenario in scenarios:
+                latencies, errors, wall = await run_scenario(
+                    client, build_requests(scenario, pages), args.requests, args.concurrency, args.repeat_inputs
+                )
+                stats = summarize(latencies) if latencies else f"{0:>6} {'-':>9} {'-':>9} {'-':>9}"
+                print(f"{scenario:<22} {stats} {len(latencies) / wall:>8.2f} {len(errors):>7}")
+                for error in errors[:1]:
+                    print(f"    first error: {error}")
+
+    print(f"\n{'stage':<22} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'total s':>8}")
+    for stage, samples in sorted(fakes.recorder.samples.items()):
+        print(f"{stage:<22} {summarize(samples)} {sum(samples):>8.2f}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--requests", type=int, default=20, help="requests per scenario")
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    arg_parser.add_argument("--scenario", action="append", choices=SCENARIOS)
+    arg_parser.add_argument("--llm-latency", type=float, default=0.25, help="fake time to first token (s)")
+    arg_parser.add_argument("--tokens-per-second", type=float, default=500.0)
+    arg_parser.add_argument("--embed-latency", type=float, default=0.05, help="fake latency per embedding call (s)")
+    arg_parser.add_argument("--search-latency", type=float, default=0.15, help="fastest fake search engine (s)")
+    arg_parser.add_argument("--llm-rpm", type=int, default=0, help="fake provider requests/minute (0 = unlimited)")
+    arg_parser.add_argument("--llm-tpm", type=int, default=0, help="fake provider tokens/minute (0 = unlimited)")
+    arg_parser.add_argument("--repeat-inputs", action="store_true", help="reuse one input per scenario (warm caches)")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Module-level config is read at import time, so point every store at scratch space first.
+        os.environ["VECTORSTORE_DIR"] = os.path.join(tmp, "vectorstores")
+        os.environ["EMBEDDING_CACHE_DIR"] = os.path.join(tmp, "embedding_cache")
+        os.environ.pop("GENERATION_CACHE_DIR", None)
+        os.environ["GROQ_RPM"] = str(args.llm_rpm)
+        os.environ["GROQ_TPM"] = str(args.llm_tpm)
+        os.environ.setdefault("GROQ_API_KEY", "offline")
+        os.environ.setdefault("GOOGLE_API_KEY", "offline")
+        asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+Deterministic local stand-ins for every external service the app talks to, so the
+benchmarks run offline and measure only our own code:
+
+  FakeChatModel   - replaces ChatGroq; configurable time-to-first-token and token rate
+  RateLimitedChatModel - FakeChatModel that answers 429 past Groq-style RPM / TPM limits
+  FakeEmbeddings  - replaces GoogleGenerativeAIEmbeddings; hash-seeded unit vectors
+  fake search     - replaces Tavily / DuckDuckGo / Exa / Serper with fixed-latency snippets
+  PageServer      - local HTTP server with article pages (ETag / 304 aware)
+
+install() patches them into the imported app modules and wires stage timing.
+"""
+import asyncio
+import hashlib
+import inspect
+import importlib
+import random
+import re
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+WORDS = (
+    "process thread scheduler kernel memory cache latency throughput index vector query "
+    "network socket protocol packet router database transaction commit lock replica shard "
+    "compiler parser token grammar runtime garbage collector heap stack queue mutex semaphore"
+).split()
+
+
+def _rng(seed: str) -> random.Random:
+    return random.Random(int(hashlib.sha256(seed.encode("utf-8")).hexdigest()[:16], 16))
+
+
+def paragraph(seed: str, words: int = 60) -> str:
+    rng = _rng(seed)
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+class StageRecorder:
+    """Collects wall-clock samples per pipeline stage (thread-safe)."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples.clear()
+
+    def wrap(self, stage: str, fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def timed_async(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.record(stage, time.perf_counter() - start)
+            return timed_async
+
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return timed
+
+
+recorder = StageRecorder()
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers every prompt the app sends with a well-formed, prompt-dependent response."""
+
+    latency: float = 0.25
+    tokens_per_second: float = 500.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark-chat"
+
+    @staticmethod
+    def _content(prompt: str) -> str:
+        for marker in ("### Raw Article:", "Content:", "<context>"):
+            if marker in prompt:
+                return prompt.split(marker, 1)[1]
+        return prompt
+
+    def respond(self, prompt: str) -> str:
+        content = self._content(prompt)
+        seed = content[:200]
+        count = re.search(r"Generate exactly (\d+)", prompt)
+        count = int(count.group(1)) if count else 5
+        if "multiple-choice" in prompt:
+            items = [
+                '{"question": "%s?", "options": ["A", "B", "C", "D"], "answer": "A", "explanation": "%s"}'
+                % (paragraph(f"{seed}q{i}", 10), paragraph(f"{seed}e{i}", 25))
+                for i in range(count)
+            ]
+            return '{"questions": [%s]}' % ", ".join(items)
+        if "technical interviewer" in prompt:
+            items = [
+                '{"question": "%s?", "answer": "%s"}' % (paragraph(f"{seed}q{i}", 12), paragraph(f"{seed}a{i}", 60))
+                for i in range(count)
+            ]
+            return '{"questions": [%s]}' % ", ".join(items)
+        if "strict article formatter" in prompt:
+            return "# " + paragraph(seed, 6) + "\n\n" + content.strip()
+        if "Write a clear, detailed" in prompt:
+            return "\n\n".join(paragraph(f"{prompt}{i}", 70) for i in range(4))
+        return paragraph(seed, 120)
+
+    def _tokens(self, text: str) -> List[str]:
+        return re.findall(r"\S+\s*", text) or [text]
+
+    def _prompt(self, messages) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    def _message(self, prompt: str, text: str) -> AIMessage:
+        """Reply with Groq-style token usage (~4 chars per prompt token, one per word of output)."""
+        input_tokens, output_tokens = len(prompt) // 4, len(self._tokens(text))
+        usage = {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+        return AIMessage(content=text, usage_metadata=usage)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        start = time.perf_counter()
+        prompt = self._prompt(messages)
+        text = self.respond(prompt)
+        time.sleep(self.latency + len(self._tokens(text)) / self.tokens_per_second)
+        recorder.record("llm", time.perf_counter() - start)
+        return ChatResult(generations=[ChatGeneration(message=self._message(prompt, text))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        start = time.perf_counter()
+        prompt = self._prompt(messages)
+        text = self.respond(prompt)
+        await asyncio.sleep(self.latency + len(self._tokens(text)) / self.tokens_per_second)
+        recorder.record("llm", time.perf_counter() - start)
+        return ChatResult(generations=[ChatGeneration(message=self._message(prompt, text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        start = time.perf_counter()
+        time.sleep(self.latency)
+        for token in self._tokens(self.respond(self._prompt(messages))):
+            time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        recorder.record("llm", time.perf_counter() - start)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        start = time.perf_counter()
+        await asyncio.sleep(self.latency)
+        for token in self._tokens(self.respond(self._prompt(messages))):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        recorder.record("llm", time.perf_counter() - start)
+
+
+class RateLimitError(Exception):
+    """Shaped like the Groq SDK error: status_code 429 and a retry-after response header."""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Error code: 429 - rate limit reached, please try again in {retry_after:.2f}s")
+        self.response = SimpleNamespace(headers={"retry-after": f"{retry_after:.3f}"})
+
+
+class RateLimitedChatModel(FakeChatModel):
+    """
+    FakeChatModel behind a Groq-style quota: `rpm` requests and `tpm` tokens (prompt +
+    completion, ~4 chars per token) per minute, replenished continuously; a call the
+    quota cannot cover gets a 429 with the time until it could. 0 disables a limit.
+    """
+
+    rpm: int = 0
+    tpm: int = 0
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _balance: Dict[str, float] = PrivateAttr(default_factory=dict)
+    _updated: float = PrivateAttr(default_factory=time.monotonic)
+    _rejected: int = PrivateAttr(default=0)
+
+    @property
+    def rejected(self) -> int:
+        return self._rejected
+
+    def _admit(self, prompt: str) -> None:
+        cost = {"requests": 1, "tokens": len(prompt) // 4 + len(self._tokens(self.respond(prompt)))}
+        limits = {"requests": self.rpm, "tokens": self.tpm}
+        with self._lock:
+            now = time.monotonic()
+            elapsed, self._updated = now - self._updated, now
+            retry_after = 0.0
+            for kind, limit in limits.items():
+                if not limit:
+                    continue
+                balance = min(limit, self._balance.get(kind, limit) + elapsed * limit / 60)
+                self._balance[kind] = balance
+                if balance < cost[kind]:
+                    retry_after = max(retry_after, (cost[kind] - balance) * 60 / limit)
+            if retry_after:
+                self._rejected += 1
+                raise RateLimitError(retry_after)
+            for kind, limit in limits.items():
+                if limit:
+                    self._balance[kind] -= cost[kind]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._admit(self._prompt(messages))
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._admit(self._prompt(messages))
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        self._admit(self._prompt(messages))
+        yield from super()._stream(messages, stop, run_manager, **kwargs)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        self._admit(self._prompt(messages))
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+
+
+class FakeEmbeddings(Embeddings):
+    """Hash-seeded unit vectors; the same text always gets the same vector."""
+
+    def __init__(self, dim: int = 768, latency: float = 0.05, per_text: float = 0.0005):
+        self.dim = dim
+        self.latency = latency
+        self.per_text = per_text
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        time.sleep(self.latency + self.per_text * len(texts))
+        recorder.record("embed", time.perf_counter() - start)
+        return [self._vector(t) for t in texts]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        await asyncio.sleep(self.latency + self.per_text * len(texts))
+        recorder.record("embed", time.perf_counter() - start)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._vector(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return self._vector(text)
+
+
+def fake_search_engine(name: str, latency: float, useful: bool = True):
+    def search(topic: str) -> str:
+        time.sleep(latency)
+        if not useful:
+            return "No useful results found."
+        return " ".join(paragraph(f"{name}{topic}{i}", 40) for i in range(3))
+    search.__name__ = f"fake_{name.lower()}_search"
+    return search
+
+
+class PageServer:
+    """
+    Serves /article/<id> as a news-style HTML page generated from <id>.
+    Responds 304 when If-None-Match matches, like a well-behaved origin.
+    """
+
+    def __init__(self, latency: float = 0.02, paragraphs: int = 12):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.latency)
+                page_id = self.path.rsplit("/", 1)[-1]
+                etag = f'"{page_id}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = server.render(page_id).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.latency = latency
+        self.paragraphs = paragraphs
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def render(self, page_id: str) -> str:
+        paragraphs = "".join(f"<p>{paragraph(f'{page_id}-{i}', 80)}</p>" for i in range(self.paragraphs))
+        return (
+            f"<html><head><title>Article {page_id}</title></head><body>"
+            f"<nav>Home | News | About</nav><article><h1>{paragraph(page_id, 8)}</h1>{paragraphs}</article>"
+            f"<footer>Copyright</footer></body></html>"
+        )
+
+    def url(self, page_id: Any) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}/article/{page_id}"
+
+    def __enter__(self) -> "PageServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# (module, attribute, stage) pairs timed by install(); llm / embed are timed by the fakes themselves.
+STAGES = [
+    ("app.Fallback.SearchfallBack", "hedged_search", "search"),
+    ("app.Utiles.GetArticle", "aextract_article_from_url", "extract"),
+    ("app.Service.ChatWithDocs", "aextract_article_from_url", "extract"),
+    ("app.Utiles.GetArticle", "aclean_and_format_news", "clean"),
+    ("app.Router.QuizGeneration_router", "agenerate_quiz_questions", "generate"),
+    ("app.Router.InterviewQGeneration_router", "agenerate_interview_questions", "generate"),
+    ("app.Service.ChatWithDocs", "_aretrieve_docs", "retrieve"),
+    ("app.Service.ChatWithDocs", "_aretrieve_url", "retrieve"),
+    ("app.Router.ChatWithDocs_router", "handle_file_upload", "ingest"),
+    ("app.Router.QuizGeneration_router", "read_upload_text", "read-file"),
+    ("app.Utiles.file_utils", "read_upload_text", "read-file"),
+]
+
+def install(
+    llm_latency: float = 0.25,
+    tokens_per_second: float = 500.0,
+    embed_latency: float = 0.05,
+    search_latency: float = 0.15,
+    llm_rpm: int = 0,
+    llm_tpm: int = 0,
+) -> None:
+    """
+    Patch the fakes into the app. Import the app only after its env config is set.
+    The fake replaces the Groq client underneath get_llm, so calls still go through the
+    LLM scheduler; llm_rpm / llm_tpm make the fake enforce a provider quota.
+    """
+    chat_model = RateLimitedChatModel(
+        latency=llm_latency, tokens_per_second=tokens_per_second, rpm=llm_rpm, tpm=llm_tpm
+    )
+
+    from app.Utiles import llm_utils
+    llm_utils._get_client = lambda model, temperature: chat_model
+    llm_utils.get_llm.cache_clear()
+    from app.Service import QuizGeneration, InterviewQGeneration
+    from app.Utiles import NewsCleaningService
+    QuizGeneration.get_quiz_chain.cache_clear()
+    InterviewQGeneration.get_interview_chain.cache_clear()
+    NewsCleaningService.get_news_cleaning_chain.cache_clear()
+
+    from app.Utiles.vectorstore_utils import get_embeddings
+    get_embeddings().underlying = FakeEmbeddings(latency=embed_latency)
+
+    from app.Fallback import SearchfallBack
+    SearchfallBack.search_engines[:] = [
+        ("Tavily", fake_search_engine("Tavily", search_latency)),
+        ("DuckDuckGo", fake_search_engine("DuckDuckGo", search_latency * 0.6, useful=False)),
+        ("Exa", fake_search_engine("Exa", search_latency * 1.5)),
+        ("Serper", fake_search_engine("Serper", search_latency * 2)),
+    ]
+
+    for module_name, attr, stage in STAGES:
+        module = importlib.import_module(module_name)
+        setattr(module, attr, recorder.wrap(stage, getattr(module, attr)))
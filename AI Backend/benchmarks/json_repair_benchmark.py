@@ -0,0 +1,99 @@
+"""
+Compare the single-pass JSON repair parser with the previous regex pipeline.
+
+Usage (from the "AI Backend" directory):
+    python -m benchmarks.json_repair_benchmark [--repeat 2000] [--corpus path.json]
+
+For every malformed LLM output in the corpus (benchmarks/corpus/json_repair_corpus.json,
+a list of {"name", "raw", "expected"} objects, "expected" being the questions as the model
+meant them) it reports whether each implementation decodes exactly those questions, every
+field value included, and the median microseconds per parse. A parser that recovers the
+right number of questions but mangles escapes in them does not count as recovering.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import time
+
+from app.Utiles.jsonExtract import extract_json
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus", "json_repair_corpus.json")
+
+
+def legacy_extract_json(raw_output: str):
+    """extract_json followed by the services' DOTALL fallback, as they were before the rewrite."""
+    def escape_control_chars(match):
+        inner = match.group(1)
+        inner = inner.replace("\\", "\\\\")
+        inner = inner.replace('"', '\\"')
+        inner = inner.replace("\n", "\\n")
+        inner = inner.replace("\r", "\\r")
+        return f'"{inner}"'
+
+    try:
+        json_match = re.search(r"```json(.*?)```", raw_output, re.DOTALL)
+        if json_match:
+            json_str = json_match.group(1).strip()
+        else:
+            start = raw_output.find("{")
+            end = raw_output.rfind("}")
+            if start == -1 or end == -1:
+                raise ValueError("No JSON object found in AI output.")
+            json_str = raw_output[start:end + 1]
+        json_str = re.sub(r'"(.*?)"', escape_control_chars, json_str, flags=re.DOTALL)
+        return json.loads(json_str)
+    except Exception:
+        match = re.search(r"\{.*\}", raw_output, re.DOTALL)
+        if match:
+            return json.loads(match.group())
+        raise ValueError("AI output is not valid JSON")
+
+
+def recovers(fn, case) -> bool:
+    try:
+        data = fn(case["raw"])
+        return data["questions"] == case["expected"]
+    except Exception:
+        return False
+
+
+def time_per_call(fn, raw: str, repeat: int) -> float:
+    samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            try:
+                fn(raw)
+            except Exception:
+                pass
+        samples.append((time.perf_counter() - start) / repeat)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--repeat", type=int, default=2000)
+    arg_parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    args = arg_parser.parse_args()
+
+    with open(args.corpus) as f:
+        cases = json.load(f)
+
+    implementations = (("legacy", legacy_extract_json), ("single-pass", extract_json))
+    totals = {name: 0 for name, _ in implementations}
+    print(f"{'case':<28} {'legacy ok':>9} {'legacy us':>10} {'new ok':>7} {'new us':>8}")
+    for case in cases:
+        row = []
+        for name, fn in implementations:
+            ok = recovers(fn, case)
+            totals[name] += ok
+            row += [ok, time_per_call(fn, case["raw"], args.repeat)]
+        legacy_ok, legacy_us, new_ok, new_us = row
+        print(f"{case['name']:<28} {str(legacy_ok):>9} {legacy_us:>10.1f} {str(new_ok):>7} {new_us:>8.1f}")
+    print(f"\nrecovered: legacy {totals['legacy']}/{len(cases)}, single-pass {totals['single-pass']}/{len(cases)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Burst of mixed-priority LLM calls against a rate-limited fake provider, with and without the scheduler.
+
+Usage (from the "AI Backend" directory):
+    python -m benchmarks.llm_scheduler_benchmark [--rpm 600] [--tpm 30000] [--batch 120] [--interactive 20]
+        [--queue-timeout 0]
+
+A backlog of batch calls (quiz / interview generation) arrives at once, then interactive
+calls (chat) trickle in while it drains. "direct" calls the provider with the client's
+usual two quick retries; "scheduled" goes through ScheduledLLM, which queues by priority
+under the same RPM / TPM quota and backs off on 429. Reports, per priority, the calls that
+succeeded and failed, p50 / p95 latency, and how many 429s the provider returned.
+--queue-timeout > 0 makes scheduled calls give up after that long in the queue, as requests do
+(GROQ_QUEUE_TIMEOUT); the default waits, to measure how the whole backlog drains.
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from benchmarks.e2e_benchmark import percentile
+from benchmarks.fakes import RateLimitedChatModel, paragraph
+
+
+async def direct_call(llm, prompt: str, retries: int = 2):
+    for attempt in range(retries + 1):
+        try:
+            return await llm.ainvoke(prompt)
+        except Exception:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+
+async def run(mode: str, args) -> None:
+    from app.Utiles.llm_scheduler import LLMScheduler, ScheduledLLM
+
+    provider = RateLimitedChatModel(latency=args.llm_latency, rpm=args.rpm, tpm=args.tpm)
+    # Both priorities share one quota, like every client of one Groq model does.
+    scheduler = LLMScheduler(args.rpm, args.tpm, timeout=args.queue_timeout)
+    clients = {}
+    for priority in ("interactive", "batch"):
+        clients[priority] = ScheduledLLM(provider, f"bench-{mode}", priority)
+        clients[priority].scheduler = scheduler
+
+    latencies: Dict[str, List[float]] = {"interactive": [], "batch": []}
+    failures = {"interactive": 0, "batch": 0}
+
+    async def call(priority: str, i: int, delay: float):
+        await asyncio.sleep(delay)
+        prompt = f"{priority} request {i}: " + paragraph(f"{priority}{i}", args.prompt_words)
+        start = time.perf_counter()
+        try:
+            if mode == "direct":
+                await direct_call(provider, prompt)
+            else:
+                await clients[priority].ainvoke(prompt)
+            latencies[priority].append(time.perf_counter() - start)
+        except Exception:
+            failures[priority] += 1
+
+    start = time.perf_counter()
+    spacing = args.interactive_spacing
+    await asyncio.gather(
+        *(call("batch", i, 0.0) for i in range(args.batch)),
+        *(call("interactive", i, 0.5 + i * spacing) for i in range(args.interactive)),
+    )
+    wall = time.perf_counter() - start
+
+    for priority in ("interactive", "batch"):
+        ms = [s * 1e3 for s in latencies[priority]]
+        p50 = f"{percentile(ms, 50):.0f}" if ms else "-"
+        p95 = f"{percentile(ms, 95):.0f}" if ms else "-"
+        print(f"{mode:<10} {priority:<12} {len(ms):>5} {failures[priority]:>7} {p50:>9} {p95:>9}")
+    print(f"{mode:<10} {'(provider)':<12} 429s returned: {provider.rejected}, wall: {wall:.1f}s")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rpm", type=int, default=600)
+    arg_parser.add_argument("--tpm", type=int, default=30000)
+    arg_parser.add_argument("--batch", type=int, default=120, help="batch calls queued at t=0")
+    arg_parser.add_argument("--interactive", type=int, default=20, help="interactive calls arriving afterwards")
+    arg_parser.add_argument("--interactive-spacing", type=float, default=1.0, help="seconds between interactive calls")
+    arg_parser.add_argument("--prompt-words", type=int, default=200)
+    arg_parser.add_argument("--llm-latency", type=float, default=0.1)
+    arg_parser.add_argument("--queue-timeout", type=float, default=0, help="seconds a scheduled call may queue (0 waits)")
+    args = arg_parser.parse_args()
+
+    print(f"quota: {args.rpm} rpm / {args.tpm} tpm, {args.batch} batch + {args.interactive} interactive calls\n")
+    print(f"{'mode':<10} {'priority':<12} {'ok':>5} {'failed':>7} {'p50 ms':>9} {'p95 ms':>9}")
+    for mode in ("direct", "scheduled"):
+        asyncio.run(run(mode, args))
+
+
+if __name__ == "__main__":
+    main()
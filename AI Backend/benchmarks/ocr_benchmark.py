@@ -0,0 +1,95 @@
+"""
+Compare the old whole-document OCR path with per-page parallel OCR.
+
+Usage (from the "AI Backend" directory; needs the tesseract binary and pytesseract):
+    python -m benchmarks.ocr_benchmark [--pages 12] [--text-pages 3]
+
+Builds a multi-page PDF where most pages are images only (a scanned document) and
+a few keep a text layer (a mixed document), then reports wall time and characters
+recovered for:
+  - legacy:   rasterise every page into memory, then OCR them one after another,
+              and only if the document has no text layer at all
+  - per-page: app.Utiles.file_utils.iter_pdf_pages (text pages read directly,
+              image-only pages OCR'd in a process pool, one page rendered at a time)
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import fitz
+
+from app.Utiles import file_utils
+
+SAMPLE = (
+    "Operating systems schedule processes on the CPU using policies such as round robin, "
+    "shortest job first and multilevel feedback queues. Page {n} discusses context switches."
+)
+
+
+def build_fixture(path: str, pages: int, text_pages: int) -> None:
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(72, 72, 540, 720), SAMPLE.format(n=n + 1), fontsize=14)
+        if n >= text_pages:
+            # Replace the page with a picture of itself so it has no text layer.
+            pixmap = page.get_pixmap(dpi=150)
+            rect = page.rect
+            doc.delete_page(n)
+            scanned = doc.new_page(pno=n, width=rect.width, height=rect.height)
+            scanned.insert_image(rect, stream=pixmap.tobytes("png"))
+    doc.save(path)
+
+
+def legacy_extract(path: str) -> str:
+    import pytesseract
+    from PIL import Image
+
+    with fitz.open(path) as doc:
+        texts = [page.get_text() for page in doc if page.get_text()]
+        if texts:
+            return "\n\n".join(texts)
+        images = [
+            Image.open(io.BytesIO(page.get_pixmap(dpi=file_utils.OCR_DPI).tobytes("png")))
+            for page in doc
+        ]
+    return "\n\n".join(t for t in (pytesseract.image_to_string(img) for img in images) if t.strip())
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--pages", type=int, default=12)
+    arg_parser.add_argument("--text-pages", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    if not file_utils.OCR_AVAILABLE:
+        raise SystemExit("pytesseract / Pillow are not installed.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scanned = os.path.join(tmp, "scanned.pdf")
+        mixed = os.path.join(tmp, "mixed.pdf")
+        build_fixture(scanned, args.pages, 0)
+        build_fixture(mixed, args.pages, args.text_pages)
+
+        # Warm the process pool so its start-up is not billed to the first run.
+        list(file_utils.iter_pdf_pages(mixed))
+
+        print(f"OCR workers: {file_utils.OCR_WORKERS}, pages: {args.pages}\n")
+        print(f"{'fixture':<10} {'path':<10} {'seconds':>8} {'chars':>8}")
+        for name, path in (("scanned", scanned), ("mixed", mixed)):
+            legacy_s, legacy_text = timed(legacy_extract, path)
+            new_s, new_text = timed(file_utils.extract_text_from_pdf, path)
+            print(f"{name:<10} {'legacy':<10} {legacy_s:>8.2f} {len(legacy_text):>8}")
+            print(f"{name:<10} {'per-page':<10} {new_s:>8.2f} {len(new_text):>8}")
+
+
+if __name__ == "__main__":
+    main()